@@ -0,0 +1,111 @@
+"""Aggregations behind the analytics, reports and sidebar widgets.
+
+Everything is derived from small grouped tables (count and amount per writer x
+type x payment status, optionally per month) that are computed once per data
+version, shared by all sessions, and patched with just the rows that changed
+(added, edited or deleted) rather than recomputed.
+"""
+import pandas as pd
+
+from data import derived_view
+
+SUMMARY_KEYS = ["Assigned To", "Type", "Payment Status"]
+ROLLUP_KEYS = ["Year", "Month"] + SUMMARY_KEYS
+
+
+def summarize(df):
+    summary = (df.groupby(SUMMARY_KEYS, dropna=False, observed=True, sort=False)["Amount"]
+                 .agg(Count="size", Revenue="sum")
+                 .reset_index())
+    # The summary is tiny; plain labels keep merges and pivots free of category bookkeeping
+    return summary.astype({k: object for k in SUMMARY_KEYS})
+
+
+def _negate(table):
+    table = table.copy()
+    table[["Count", "Revenue"]] *= -1
+    return table
+
+
+def _apply_summaries(old, delta):
+    # Counts and sums are additive: add the new rows, subtract the ones that went away
+    parts = [old, summarize(delta.added)] + ([] if delta.appends_only else [_negate(summarize(delta.removed))])
+    both = pd.concat(parts).groupby(SUMMARY_KEYS, dropna=False, sort=False)[["Count", "Revenue"]].sum()
+    return both[both["Count"] != 0].reset_index()
+
+
+task_summary = derived_view(summarize, merge=_apply_summaries)
+
+
+# --- MONTHLY ROLLUP ---
+
+def rollup(df):
+    """Count and amount per (year, month, writer, type, payment status), indexed for .loc lookups."""
+    df = df[df["Time"].notna()]
+    keys = [df["Time"].dt.year.rename("Year"), df["Time"].dt.month.rename("Month")]
+    keys += [df[k].astype(object) for k in SUMMARY_KEYS]
+    return df.groupby(keys, dropna=False)["Amount"].agg(Count="size", Revenue="sum")
+
+
+def _apply_rollups(old, delta):
+    parts = [old, rollup(delta.added)] + ([] if delta.appends_only else [_negate(rollup(delta.removed))])
+    both = pd.concat(parts).groupby(level=ROLLUP_KEYS, dropna=False).sum()
+    return both[both["Count"] != 0]
+
+
+monthly_rollup = derived_view(rollup, merge=_apply_rollups)
+
+
+def report_years(table):
+    return sorted(table.index.get_level_values("Year").unique().astype(int), reverse=True)
+
+
+def month_metrics(table, year, month):
+    """Fresh Tasks / Revisions / Total Billed / Amount Received for one month, or None if it had no tasks."""
+    try:
+        m = table.loc[(year, month)]
+    except KeyError:
+        return None
+    kind = m.index.get_level_values("Type")
+    status = m.index.get_level_values("Payment Status")
+    return {
+        "new": int(m.loc[kind == "New Task", "Count"].sum()),
+        "rev": int(m.loc[kind == "Revision", "Count"].sum()),
+        "billed": m["Revenue"].sum(),
+        "received": m.loc[status == "Received", "Revenue"].sum(),
+    }
+
+
+def _month_mask(df, year, month):
+    return (df["Time"].dt.year == year) & (df["Time"].dt.month == month)
+
+
+def _keep_unless_touched(old, delta, year, month):
+    # New rows are stamped "now" and edits are rare, so closed months keep their cached report
+    touched = _month_mask(delta.added, year, month).any() or _month_mask(delta.removed, year, month).any()
+    return None if touched else old
+
+
+@derived_view(merge=_keep_unless_touched)
+def month_report(df, year, month):
+    return df[_month_mask(df, year, month)]
+
+
+def chart_data(summary):
+    return summary.groupby(["Assigned To", "Type"], sort=True)["Count"].sum().reset_index()
+
+
+def writer_breakdown(summary, writers=()):
+    """Fresh tasks, revisions and revenue per writer; listed writers first, then anyone else in the data."""
+    counts = summary.pivot_table(index="Assigned To", columns="Type", values="Count", aggfunc="sum", fill_value=0)
+    table = pd.DataFrame({
+        "New Task": counts["New Task"] if "New Task" in counts else 0,
+        "Revision": counts["Revision"] if "Revision" in counts else 0,
+        "Revenue": summary.groupby("Assigned To")["Revenue"].sum(),
+    })
+    order = list(writers) + [w for w in table.index if w not in writers and isinstance(w, str) and w.strip()]
+    return table.reindex(order, fill_value=0)
+
+
+def pending_total(summary):
+    return summary.loc[summary["Payment Status"] == "Pending", "Revenue"].sum()
@@ -0,0 +1,161 @@
+# ==========================================
+# PAGE 1: TASK ASSIGNMENT
+# ==========================================
+from datetime import datetime
+
+import streamlit as st
+
+import ui
+from data import TIME_FORMAT, StorageUnavailable, check_rows
+from dispatch import batch_rows, dispatch, preview, read_manifest, upload_key
+from outbox import AlreadySubmitted, append_rows, ensure_new
+from routing import claim_writer, load_window_days, next_writer, paused, queues, routing_mode, writer_loads
+
+ui.title("fa-paper-plane", "Dispatch Console")
+st.markdown("<p style='color: #64748b; margin-bottom: 30px; font-size: 1.1rem;'>Smart routing system for seamless task distribution.</p>", unsafe_allow_html=True)
+
+# Auto-Assign Calculation
+try:
+    current_writer_new = next_writer("New Task")
+    current_writer_rev = next_writer("Revision", "High")
+except ValueError as e:  # every writer of a queue paused, or an unknown routing mode
+    st.error(str(e))
+    st.stop()
+
+c_form, c_info = st.columns([2.5, 1]) 
+
+with c_form:
+    with st.container(border=True):
+        st.markdown("### <i class='fa-solid fa-file-signature' style='color:#3b82f6; margin-right:8px;'></i> Create New Entry", unsafe_allow_html=True)
+        mode = st.radio("Task Type", ["New Task", "Revision"], horizontal=True, label_visibility="collapsed")
+        st.write("")
+
+        if mode == "New Task":
+            st.markdown(f"""
+            <div class="assign-box">
+                <span style="color:#64748b; font-size:0.85rem; text-transform:uppercase;"><i class="fa-solid fa-user-check"></i> Next Writer in Queue</span><br>
+                <span style="font-weight: 800; font-size: 1.3rem;">{current_writer_new}</span>
+            </div>
+            """, unsafe_allow_html=True)
+
+            bulk = st.toggle("Bulk Mode: several files and/or a CSV manifest", key="bulk")
+            if bulk:
+                u_files = st.file_uploader("Upload Client Files", accept_multiple_files=True, key="n_files")
+                m_file = st.file_uploader("CSV Manifest (optional): Task / File, Work Category, Amount, Priority, Payment Status",
+                                          type="csv", key="manifest")
+            else:
+                u_file = st.file_uploader("Upload Client File", key="n_file")
+            col1, col2 = st.columns(2)
+            cat = col1.selectbox("Work Category", ["Assignment", "Article", "Copywriting", "Other"], key="cat")
+            priority = col2.select_slider("Priority Level", ["Normal", "High", "Urgent"], value="Normal")
+
+            col3, col4 = st.columns(2)
+            amount = col3.number_input("PKR Amount Charged", min_value=0, step=500, value=0)
+            pay_status = col4.selectbox("Payment Status", ["Pending", "Received"], key="pay")
+
+            st.write("")
+            if bulk:
+                # Form values fill in whatever the manifest leaves out
+                defaults = {"Work Category": cat, "Amount": amount, "Payment Status": pay_status, "Priority": priority}
+                try:
+                    manifest = read_manifest(m_file) if m_file else None
+                except ValueError as e:
+                    manifest = None
+                    st.error(f"Manifest not usable: {e}")
+                batch = batch_rows([f.name for f in u_files], manifest, defaults)
+                if batch:
+                    st.dataframe(preview(batch), use_container_width=True, hide_index=True)
+                    st.caption("Writers shown continue the queue from its current position and are fixed on confirm.")
+                if st.button(f"✓ Confirm & Assign {len(batch)} Tasks", type="primary", use_container_width=True):
+                    if batch:
+                        try:
+                            writers = dispatch(batch, upload_key(*u_files, m_file))
+                            st.success(f"{len(writers)} tasks assigned!")
+                            st.rerun()
+                        except AlreadySubmitted:
+                            st.warning("These uploads were already assigned. Upload them again to add them once more.")
+                        except (ValueError, StorageUnavailable) as e:
+                            st.error(str(e))
+                    else:
+                        st.error("Please upload files or a manifest to proceed.")
+            elif st.button("✓ Confirm & Assign Task", type="primary", use_container_width=True):
+                if u_file:
+                    ts = datetime.now().strftime(TIME_FORMAT)
+                    key = upload_key(u_file)  # one submission per upload, however often it is clicked
+                    row = {"Task / File": u_file.name, "Type": "New Task", "Time": ts, "Work Category": cat,
+                           "Amount": amount, "Payment Status": pay_status, "Priority": priority}
+                    try:
+                        # Check before claiming so a bad or repeated entry doesn't use up a queue position
+                        ensure_new(key)
+                        check_rows([row])
+                        # Another session may have taken the displayed slot already
+                        current_writer_new = claim_writer("New Task", priority)
+                        append_rows([{**row, "Assigned To": current_writer_new}], key)
+                        st.success(f"Task successfully assigned to {current_writer_new}!")
+                        st.rerun()
+                    except AlreadySubmitted:
+                        st.warning("This upload was already assigned. Upload the file again to add it once more.")
+                    except (ValueError, StorageUnavailable) as e:
+                        st.error(str(e))
+                else:
+                    st.error("Please upload a file to proceed.")
+
+        else: # Revision
+            st.markdown(f"""
+            <div class="rev-box">
+                <span style="color:#ea580c; font-size:0.85rem; text-transform:uppercase;"><i class="fa-solid fa-rotate-left"></i> Revision Routing To</span><br>
+                <span style="font-weight: 800; font-size: 1.3rem;">{current_writer_rev}</span>
+            </div>
+            """, unsafe_allow_html=True)
+
+            r_file = st.file_uploader("Upload Revision File", key="r_file")
+            st.info("Note: Revisions are automatically marked as non-billable.")
+
+            st.write("")
+            if st.button("↻ Send Revision", type="primary", use_container_width=True):
+                if r_file:
+                    ts = datetime.now().strftime(TIME_FORMAT)
+                    key = upload_key(r_file)
+                    row = {"Task / File": r_file.name, "Type": "Revision", "Time": ts, "Work Category": "Revision",
+                           "Amount": 0, "Payment Status": "N/A", "Priority": "High"}
+                    try:
+                        ensure_new(key)
+                        check_rows([row])
+                        current_writer_rev = claim_writer("Revision", "High")
+                        append_rows([{**row, "Assigned To": current_writer_rev}], key)
+                        st.success(f"Revision sent to {current_writer_rev}!")
+                        st.rerun()
+                    except AlreadySubmitted:
+                        st.warning("This revision was already sent. Upload the file again to send it once more.")
+                    except (ValueError, StorageUnavailable) as e:
+                        st.error(str(e))
+                else:
+                    st.error("Please upload the revision file.")
+
+with c_info:
+    st.markdown("#### <i class='fa-solid fa-network-wired' style='color:#64748b; margin-right:8px;'></i> System Rules", unsafe_allow_html=True)
+    # Built from the configured roster: paused writers are shown but skipped
+    orders, skipped, mode = queues(), paused(), routing_mode()
+    loads = writer_loads(sorted(set().union(*orders.values()))) if mode == "workload" else {}
+    seq = {}
+    for queue, order in orders.items():
+        seq[queue] = "<br>".join(
+            f"{i}. " + (f"<s>{w}</s> <i>(paused)</i>" if w in skipped else w)
+            + (f" <span style='color:#94a3b8;'>· load {loads[w]:g}</span>" if w in loads and w not in skipped else "")
+            for i, w in enumerate(order, 1))
+    mode_note = (f"Least loaded writer first (tasks of the last {load_window_days()} days, weighted by priority); ties go in sequence."
+                 if mode == "workload" else "Strict rotation in sequence order.")
+    st.markdown(f"""
+    <div class='modern-card' style='padding: 20px;'>
+        <div style='color: #64748b; font-size: 0.9rem; margin-bottom: 15px;'><i class='fa-solid fa-scale-balanced'></i> {mode_note}</div>
+        <div style='color: #2563eb; font-weight: 700; margin-bottom: 10px;'><i class='fa-solid fa-arrow-down-1-9'></i> Fresh Sequence</div>
+        <div style='color: #475569; font-weight: 400; line-height: 1.8;'>
+            {seq["New Task"]}
+        </div>
+        <hr style='border-color: #e2e8f0; margin: 15px 0;'>
+        <div style='color: #ea580c; font-weight: 700; margin-bottom: 10px;'><i class='fa-solid fa-arrow-down-1-9'></i> Revision Sequence</div>
+        <div style='color: #475569; font-weight: 400; line-height: 1.8;'>
+            {seq["Revision"]}
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
@@ -0,0 +1,48 @@
+# ==========================================
+# PAGE 5: DIAGNOSTICS (only listed when metrics are on)
+# ==========================================
+import pandas as pd
+import streamlit as st
+
+import perf
+import ui
+from ui import ADMIN_PASSWORD
+
+ui.title("fa-gauge-high", "Diagnostics")
+st.write("")
+
+if st.text_input("Admin Password", type="password") != ADMIN_PASSWORD:
+    st.info("Enter the admin password to view rerun timings.")
+else:
+    reruns = perf.history()
+    mine = [r for r in reruns if r["session"] == perf.session_id()]
+
+    with st.container(border=True):
+        st.markdown("#### <i class='fa-solid fa-stopwatch' style='color:#3b82f6; margin-right:8px;'></i> Your Last Rerun", unsafe_allow_html=True)
+        if mine:
+            last = mine[-1]
+            d1, d2, d3, d4 = st.columns(4)
+            d1.metric("Total", f"{last['total_ms']:,.0f} ms")
+            d2.metric("First Paint", f"{last['paint_ms']:,.0f} ms" if last["paint_ms"] is not None else "-")
+            d3.metric("Page", last["page"] or "(interrupted)")
+            d4.metric("Backend Calls", sum(last["calls"].values()))
+            st.dataframe(pd.DataFrame(last["ms"].items(), columns=["Stage", "ms"]).sort_values("ms", ascending=False),
+                         use_container_width=True, hide_index=True)
+        else:
+            st.write("Nothing recorded for this session yet.")
+
+    st.markdown(f"#### Recent Reruns (last {len(reruns):,}, all sessions)")
+    st.dataframe(perf.stage_stats(reruns), use_container_width=True, hide_index=True)
+    st.markdown("**Time to first paint by page** (until the page heading is sent)")
+    st.dataframe(perf.paint_stats(reruns), use_container_width=True, hide_index=True)
+
+    c_sess, c_proc = st.columns(2)
+    with c_sess:
+        st.markdown("**Backend calls by session**")
+        st.dataframe(perf.calls_by_session(reruns), use_container_width=True)
+    with c_proc:
+        st.markdown("**Backend calls by this process** (incl. background sync)")
+        st.dataframe(pd.Series(perf.process_calls(), name="Calls", dtype=int), use_container_width=True)
+
+    st.download_button("⤓ Export Metrics (JSON Lines)", perf.export_jsonl(reruns),
+                       file_name="writewise_metrics.jsonl", mime="application/x-ndjson")
@@ -0,0 +1,56 @@
+# ==========================================
+# PAGE 2: PERFORMANCE ANALYTICS
+# ==========================================
+import streamlit as st
+
+import perf
+import ui
+from analytics import chart_data, task_summary, writer_breakdown
+from data import get_data
+from routing import queues
+
+ui.title("fa-chart-pie", "Agency Analytics")
+st.write("")
+# Only this page draws charts; Altair takes a while to import, so load it after the heading is out
+import altair as alt  # noqa: E402
+
+df = get_data()
+if not df.empty:
+    summary = task_summary()
+    with perf.span("analytics.chart"):
+        chart = alt.Chart(chart_data(summary)).mark_bar(cornerRadiusTopLeft=6, cornerRadiusTopRight=6).encode(
+            x=alt.X('Assigned To', axis=alt.Axis(labelAngle=0, title="Writers")),
+            y=alt.Y('Count', title="Total Tasks"),
+            color=alt.Color('Type', scale=alt.Scale(domain=['New Task', 'Revision'], range=['#2563eb', '#f97316'])),
+            tooltip=['Assigned To', 'Type', 'Count']
+        ).properties(height=350).configure_axis(grid=False, labelFontSize=12).configure_view(strokeWidth=0)
+
+    with st.container(border=True):
+        st.altair_chart(chart, use_container_width=True)
+
+    st.markdown("<h3 style='margin-top: 30px; margin-bottom: 20px;'><i class='fa-solid fa-users-viewfinder' style='color:#3b82f6; margin-right:8px;'></i> Writer Breakdown</h3>", unsafe_allow_html=True)
+    breakdown = writer_breakdown(summary, queues()["New Task"])
+
+    for i, (writer, stats) in enumerate(breakdown.iterrows()):
+        if i % 3 == 0:
+            cols = st.columns(3)
+        n_count, r_count, total_rev = int(stats['New Task']), int(stats['Revision']), stats['Revenue']
+
+        with cols[i % 3]:
+            st.markdown(f"""
+            <div class="modern-card">
+                <h4 style="margin:0; color:#0f172a; font-weight:800; font-size: 1.2rem;">{writer}</h4>
+                <hr style="margin:15px 0; border-top:1px solid #f1f5f9;">
+                <div style="display:flex; justify-content:space-between; margin-bottom: 8px; font-size: 1.05rem;">
+                    <span style="color:#64748b;">Fresh Tasks</span> <b style="color:#2563eb;">{n_count}</b>
+                </div>
+                <div style="display:flex; justify-content:space-between; margin-bottom: 8px; font-size: 1.05rem;">
+                    <span style="color:#64748b;">Revisions</span> <b style="color:#ea580c;">{r_count}</b>
+                </div>
+                <div style="display:flex; justify-content:space-between; margin-top: 15px; padding-top: 15px; border-top: 1px dashed #e2e8f0; font-size: 1.05rem;">
+                    <span style="color:#0f172a; font-weight: 700;">Revenue</span> <b style="color:#10b981;">Rs {total_rev:,.0f}</b>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+else:
+    st.info("No data available for analytics yet.")
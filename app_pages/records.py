@@ -0,0 +1,112 @@
+# ==========================================
+# PAGE 4: MANAGE DATABASE
+# ==========================================
+import streamlit as st
+
+import ui
+from data import InvalidRows, StorageUnavailable, WriteConflict, data_issues, expected_values, get_data
+from outbox import AlreadySubmitted, action_key, delete_record, update_record
+from search import SORTS, browse
+from ui import ADMIN_PASSWORD, TIME_COLUMN
+
+EDITABLE = ["Amount", "Payment Status"]
+
+ui.title("fa-database", "Database Records")
+st.write("")
+
+df = get_data()
+
+c_s, c_b = st.columns([3, 1])
+search = c_s.text_input("Search Records", placeholder="Search by filename or writer name...")
+sort = c_b.selectbox("Sort By", SORTS)
+
+if not df.empty:
+    issues = data_issues()
+    if not issues.empty:
+        with st.expander(f"⚠ {issues.index.nunique():,} records have data problems"):
+            st.dataframe(df.loc[issues.index.unique()[:200]].join(issues.groupby(level=0)["Problem"].agg(", ".join)),
+                         use_container_width=True, hide_index=True, column_config={"Time": TIME_COLUMN},
+                         column_order=["Time", "Task / File", "Type", "Assigned To", "Amount", "Payment Status", "Problem"])
+
+    f1, f2, f3, f4 = st.columns(4)
+    f_type = f1.selectbox("Type", ["All", "New Task", "Revision"])
+    f_stat = f2.selectbox("Payment Status", ["All", "Pending", "Received", "N/A"])
+    page_size = f3.selectbox("Rows per Page", [25, 50, 100], index=1)
+
+    # Only the current page is sliced out and sent to the browser
+    pos = browse(df, search, {"Type": f_type if f_type != "All" else None,
+                              "Payment Status": f_stat if f_stat != "All" else None}, sort)
+    n_pages = max(1, -(-len(pos) // page_size))
+    # Keyed on the filters so a new search starts back at page 1
+    page_no = f4.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, value=1,
+                              key=f"page_{search}_{f_type}_{f_stat}_{sort}_{page_size}")
+    first = (page_no - 1) * page_size
+    page_df = df.iloc[pos[first:first + page_size]]
+
+    st.dataframe(
+        page_df, height=350, use_container_width=True, hide_index=True,
+        column_order=["Time", "Task / File", "Type", "Assigned To", "Amount", "Payment Status"],
+        column_config={
+            "Time": TIME_COLUMN,
+            "Amount": st.column_config.NumberColumn("PKR", format="Rs %d"),
+            "Payment Status": st.column_config.TextColumn("Status")
+        }
+    )
+    st.caption(f"Showing {first + 1 if len(pos) else 0:,}-{first + len(page_df):,} of {len(pos):,} records")
+
+    st.write("---")
+    with st.container(border=True):
+        st.markdown("#### <i class='fa-solid fa-sliders' style='color:#64748b; margin-right:8px;'></i> Modification Panel", unsafe_allow_html=True)
+        if page_df.empty:
+            st.info("No records match your search.")
+        else:
+            # Picker lists the records on the current page; use search/filters to reach others
+            idx = st.selectbox("Select a Record to Edit/Delete", page_df.index,
+                               format_func=lambda i: f"{df.at[i, 'Task / File']} ({df.at[i, 'Assigned To']} - {df.at[i, 'Type']})")
+            # A click is checked against the record as the panel showed it on the
+            # previous run, not as it is by the time the click comes in
+            shown = expected_values(df.loc[idx], EDITABLE)
+            base = st.session_state.get("edit_base")
+            expected = base["expected"] if base and base["idx"] == idx else shown
+
+            ec1, ec2 = st.columns(2)
+            e_amt = ec1.number_input("Edit PKR Amount", min_value=0, value=max(int(df.at[idx, "Amount"]), 0), step=500)
+
+            cur_stat = df.at[idx, "Payment Status"]
+            opts = ["Pending", "Received", "N/A"]
+            s_idx = opts.index(cur_stat) if cur_stat in opts else 0
+            e_stat = ec2.selectbox("Edit Payment Status", opts, index=s_idx)
+
+            if st.button("✓ Save Changes", type="primary"):
+                changes = {"Amount": e_amt, "Payment Status": e_stat}
+                try:
+                    # The same change to the record as shown is one edit, however often it is clicked
+                    update_record(idx, changes, action_key("update", idx, expected, changes), expected)
+                    st.success("Record updated successfully.")
+                    st.rerun()
+                except AlreadySubmitted:
+                    st.warning("This change was already submitted.")
+                except (InvalidRows, WriteConflict, StorageUnavailable) as e:
+                    st.error(str(e))
+
+            st.divider()
+            with st.form("del_form"):
+                st.markdown("<span style='color: #ef4444; font-weight: 600;'><i class='fa-solid fa-triangle-exclamation'></i> Danger Zone: Delete Record</span>", unsafe_allow_html=True)
+                col_p, col_btn = st.columns([3, 1])
+                d_pass = col_p.text_input("Enter Admin Password to Delete", type="password")
+
+                if col_btn.form_submit_button("Delete Permanently"):
+                    if d_pass == ADMIN_PASSWORD:
+                        try:
+                            delete_record(idx, action_key("delete", idx, expected), expected)
+                            st.success("Deleted successfully!")
+                            st.rerun()
+                        except AlreadySubmitted:
+                            st.warning("This record was already submitted for deletion.")
+                        except (WriteConflict, StorageUnavailable) as e:
+                            st.error(str(e))
+                    else:
+                        st.error("Incorrect Password")
+            st.session_state["edit_base"] = {"idx": idx, "expected": shown}
+else:
+    st.info("Database is empty.")
@@ -0,0 +1,110 @@
+# ==========================================
+# PAGE 3: MONTHLY REPORTS
+# ==========================================
+from datetime import date, datetime
+
+import streamlit as st
+
+import ui
+from analytics import month_metrics, month_report, monthly_rollup, report_years
+from data import get_data
+from export import FORMATS, exporter, select
+from ui import TIME_COLUMN
+
+ui.title("fa-file-invoice-dollar", "Financial Reports")
+st.write("")
+
+df = get_data()
+
+if df.empty:
+    st.warning("No data available to generate reports.")
+else:
+    rollup = monthly_rollup()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        years = report_years(rollup)
+        if len(years) > 0:
+            selected_year = st.selectbox("Select Year", years)
+        else:
+            selected_year = datetime.now().year
+            st.selectbox("Select Year", [selected_year])
+    with col2:
+        month_names = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+        selected_month_name = st.selectbox("Select Month", month_names, index=datetime.now().month - 1)
+        selected_month_num = month_names.index(selected_month_name) + 1
+
+    if st.button("✓ Generate Report", type="primary"):
+        metrics = month_metrics(rollup, selected_year, selected_month_num)
+
+        st.write("---")
+
+        if metrics is None:
+            st.info(f"No tasks were recorded in {selected_month_name} {selected_year}.")
+        else:
+            report_df = month_report(selected_year, selected_month_num)
+            new_tasks, rev_tasks = metrics["new"], metrics["rev"]
+            total_rev, received_rev = metrics["billed"], metrics["received"]
+
+            # Native Streamlit metrics (We rely on our custom CSS to style these nicely)
+            r1, r2, r3, r4 = st.columns(4)
+            r1.metric("Fresh Tasks", new_tasks)
+            r2.metric("Revisions", rev_tasks)
+            r3.metric("Total Billed", f"Rs {total_rev:,.0f}")
+            r4.metric("Amount Received", f"Rs {received_rev:,.0f}")
+
+            st.write("")
+            st.markdown("<br>", unsafe_allow_html=True)
+            c_new, c_rev = st.columns(2)
+
+            with c_new:
+                st.markdown("<div class='col-header'><i class='fa-solid fa-file-circle-plus' style='color:#2563eb; margin-right:8px;'></i> Fresh Tasks Log</div>", unsafe_allow_html=True)
+                new_df = report_df[report_df["Type"] == "New Task"].drop(columns=['Type', 'Work Category', 'Priority'])
+                if not new_df.empty:
+                    st.dataframe(new_df, use_container_width=True, hide_index=True, column_config={"Time": TIME_COLUMN})
+                else:
+                    st.write("No new tasks this month.")
+
+            with c_rev:
+                st.markdown("<div class='col-header'><i class='fa-solid fa-wrench' style='color:#ea580c; margin-right:8px;'></i> Revisions Log</div>", unsafe_allow_html=True)
+                rev_df = report_df[report_df["Type"] == "Revision"][['Time', 'Task / File', 'Assigned To']]
+                if not rev_df.empty:
+                    st.dataframe(rev_df, use_container_width=True, hide_index=True, column_config={"Time": TIME_COLUMN})
+                else:
+                    st.write("No revisions this month. Great job!")
+
+            st.write("---")
+            # Built only if clicked
+            st.download_button(
+                label=f"⤓ Download Full CSV",
+                data=exporter(report_df),
+                file_name=f"WriteWise_Report_{selected_month_name}_{selected_year}.csv",
+                mime="text/csv",
+                on_click="ignore"
+            )
+
+    st.write("---")
+    with st.container(border=True):
+        st.markdown("#### <i class='fa-solid fa-file-export' style='color:#3b82f6; margin-right:8px;'></i> Custom Export", unsafe_allow_html=True)
+        x1, x2 = st.columns(2)
+        dates = x1.date_input("Date Range", (date(selected_year, 1, 1), date(selected_year, 12, 31)), format="DD/MM/YYYY")
+        x_fmt = x2.selectbox("Format", list(FORMATS))
+        x3, x4, x5 = st.columns(3)
+        x_writers = x3.multiselect("Writers", list(df["Assigned To"].cat.categories))
+        x_types = x4.multiselect("Type", ["New Task", "Revision"])
+        x_stats = x5.multiselect("Payment Status", ["Pending", "Received", "N/A"])
+
+        if len(dates) == 2:
+            x_start, x_end = dates
+            x_filters = {"Assigned To": x_writers, "Type": x_types, "Payment Status": x_stats}
+            ext, mime = FORMATS[x_fmt]
+            st.caption(f"{len(select(df, x_start, x_end, x_filters)):,} records match. The file is generated when you click download.")
+            st.download_button(
+                label=f"⤓ Export {x_fmt}",
+                data=exporter(df, x_fmt, x_start, x_end, x_filters),
+                file_name=f"WriteWise_Export_{x_start:%Y%m%d}-{x_end:%Y%m%d}.{ext}",
+                mime=mime,
+                on_click="ignore"
+            )
+        else:
+            st.info("Pick an end date for the range.")
@@ -0,0 +1,209 @@
+"""Headless benchmarks for the CRM's hot paths.
+
+Runs the same code the pages use against a synthetic task history served by
+an in-memory stand-in for the Google Sheets connection, and reports median
+latency and peak Python-heap memory per path::
+
+    python bench.py --rows 1000 100000 1000000
+    python bench.py --rows 100000 --json baseline.json
+    python bench.py --rows 100000 --baseline baseline.json --tolerance 1.3
+
+With ``--baseline`` the run exits non-zero if any path got slower than
+``tolerance`` times its baseline latency, so it can gate a deploy.
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from streamlit import logger
+
+# Before the app's modules read their settings: saves go straight to the stand-in
+# sheet, and the real outbox journal is never opened (its flusher would replay
+# queued production saves into the benchmark's sheet)
+os.environ["CRM_WRITE_BEHIND"] = "false"
+os.environ["CRM_OUTBOX_PATH"] = os.path.join(tempfile.mkdtemp(prefix="writewise-bench-"), "outbox.db")
+
+import analytics  # noqa: E402
+import data  # noqa: E402
+import routing  # noqa: E402
+from schema import REQ_COLS, TIME_FORMAT  # noqa: E402
+from search import SearchIndex, browse, search_index  # noqa: E402
+from storage import GSheetsBackend  # noqa: E402
+
+# After the imports: loading Streamlit resets the level. Silences the "no runtime" warnings of bare mode.
+logger.set_log_level("error")
+
+WRITERS = routing.queues()["New Task"]
+CATEGORIES = ["Assignment", "Article", "Copywriting", "Other"]
+QUERIES = ["imran", "essay", "report 2024", "mazhar final", "mran"]
+
+
+# --- SYNTHETIC DATA ---
+
+def synthetic_tasks(n, seed=0, start="2023-01-01"):
+    """A sheet-shaped task history (all text, as the sheet returns it) of `n` rows."""
+    rng = np.random.default_rng(seed)
+    is_rev = rng.random(n) < 0.25
+    # Roughly 40 tasks a day, in time order like the real sheet
+    minutes = np.sort(rng.integers(0, max(n // 40, 1) * 24 * 60, n))
+    times = (pd.Timestamp(start) + pd.to_timedelta(minutes, unit="m")).strftime(TIME_FORMAT)
+    new_pos = np.cumsum(~is_rev) - 1
+    rev_pos = np.cumsum(is_rev) - 1
+    writers = np.where(is_rev, np.array(routing.queues()["Revision"])[rev_pos % 3], np.array(WRITERS)[new_pos % 3])
+    words = np.array(["essay", "report", "thesis", "blog", "final", "draft", "case_study", "proposal"])
+    names = pd.Series(words[rng.integers(0, len(words), n)]).str.cat(
+        [pd.Series(rng.integers(1000, 99999, n).astype(str)), pd.Series(minutes // (365 * 24 * 60) + 2023).astype(str)],
+        sep="_") + ".docx"
+    return pd.DataFrame({
+        "Task / File": names,
+        "Type": np.where(is_rev, "Revision", "New Task"),
+        "Assigned To": writers,
+        "Time": times,
+        "Work Category": np.where(is_rev, "Revision", np.array(CATEGORIES)[rng.integers(0, 4, n)]),
+        "Amount": np.where(is_rev, 0, rng.integers(1, 20, n) * 500).astype(str),
+        "Payment Status": np.where(is_rev, "N/A", np.where(rng.random(n) < 0.7, "Received", "Pending")),
+        "Priority": np.where(is_rev, "High", np.array(["Normal", "High", "Urgent"])[rng.integers(0, 3, n)]),
+    })[REQ_COLS]
+
+
+class LocalSheet:
+    """Stands in for GSheetsConnection: same read/update calls, data kept in memory."""
+
+    class _Client:
+        pass  # no row-level API and no revision marker, like a public-URL sheet
+
+    def __init__(self, raw, latency=0.0):
+        self.raw = raw
+        self.latency = latency
+        self.client = self._Client()
+        self.calls = 0
+
+    def read(self, ttl=None, **options):
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.raw.copy()
+
+    def update(self, data=None, **options):
+        self.calls += 1
+        time.sleep(self.latency)
+        self.raw = data.reset_index(drop=True)
+
+
+# --- MEASUREMENT ---
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    # Peak memory from one extra, traced run so tracing overhead stays out of the timings
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+def hot_paths(rows, latency):
+    sheet = LocalSheet(synthetic_tasks(rows), latency)
+    data.use_backend(GSheetsBackend(sheet))
+    df = data.get_data()
+    last = df["Time"].max()
+    index = SearchIndex.build(df)
+    search_index()  # built once per data version in the app too; keep it out of "browse page"
+
+    def load_cold():
+        # A fresh process: nothing cached, so a full read and normalize
+        data.use_backend(GSheetsBackend(sheet))
+        data.get_data()
+
+    def sync_append():
+        # Another operator added a task: one diffed read merges a single row
+        sheet.raw = pd.concat([sheet.raw, synthetic_tasks(1, seed=len(sheet.raw), start="2100-01-01")], ignore_index=True)
+        data.invalidate()
+        data.get_data()
+        analytics.task_summary()
+
+    def assign():
+        routing.next_writer("New Task")
+        routing.next_writer("Revision")
+
+    def analytics_page():
+        summary = analytics.summarize(df)
+        analytics.chart_data(summary)
+        analytics.writer_breakdown(summary, WRITERS)
+        analytics.pending_total(summary)
+
+    def monthly_report():
+        table = analytics.rollup(df)
+        analytics.month_metrics(table, last.year, last.month)
+        analytics.month_report.__wrapped__(df, last.year, last.month)
+
+    def search():
+        for q in QUERIES:
+            index.lookup(q)
+
+    def browse_page():
+        pos = browse(df, "essay", {"Payment Status": "Pending"}, "Amount (high to low)")
+        df.iloc[pos[:50]]
+
+    # These change the data and so drop or patch the shared derived views; they run last
+    return {
+        "get_data (cached)": data.get_data,
+        "auto-assign": assign,
+        "analytics": analytics_page,
+        "monthly report": monthly_report,
+        "search index build": lambda: SearchIndex.build(df),
+        f"search ({len(QUERIES)} queries)": search,
+        "browse page": browse_page,
+        "sync one new row": sync_append,
+        "get_data (cold)": load_cold,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated sheet round trip, seconds")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=1.3)
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(f"{'rows':>10}  {'path':<24}{'median ms':>12}{'peak MiB':>11}")
+    for rows in args.rows:
+        for name, fn in hot_paths(rows, args.latency).items():
+            seconds, peak = measure(fn, args.repeat)
+            results[f"{rows}/{name}"] = {"rows": rows, "path": name, "ms": seconds * 1000, "peak_mib": peak / 2**20}
+            print(f"{rows:>10,}  {name:<24}{seconds * 1000:>12.2f}{peak / 2**20:>11.1f}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        slower = [(key, baseline[key]["ms"], res["ms"]) for key, res in results.items()
+                  if key in baseline and res["ms"] > baseline[key]["ms"] * args.tolerance]
+        for key, before, after in slower:
+            print(f"REGRESSION {key}: {before:.2f} ms -> {after:.2f} ms")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""Runtime settings for WriteWise CRM.
+
+Values come from the ``[crm]`` table of ``.streamlit/secrets.toml`` and can be
+overridden per process with ``CRM_<KEY>`` environment variables::
+
+    [crm]
+    cache_ttl = 30                # seconds between checks for changed data
+    backend = "gsheets"           # or "sqlite"
+    sqlite_path = "writewise.db"
+    sheet_sync_interval = 0       # sqlite only: mirror to the sheet every N seconds
+    write_behind = true           # acknowledge saves at once, write them in the background
+    outbox_path = "writewise-outbox.db"  # journal of saves not yet written; replicas
+                                  # may share it only if they share shared_state too
+    shared_state = "local"        # or "sqlite" / "redis" when running several replicas
+    shared_state_path = "writewise-shared.db"  # sqlite: a file every replica can reach
+    redis_url = "redis://localhost:6379/0"
+    metrics = false               # time each rerun stage and count backend calls
+    metrics_file = ""             # also append each rerun as a JSON line here
+    admin_password = "1234"       # deleting records, Diagnostics page
+    new_task_writers = ["Muhammad Imran", "Mazhar Abbas", "Muhammad Ahmad"]
+    revision_writers = ["Muhammad Ahmad", "Mazhar Abbas", "Muhammad Imran"]
+    paused_writers = []           # kept on the roster but skipped by routing
+    routing = "round_robin"       # or "workload": least loaded writer first
+    load_window_days = 3          # workload: tasks from the last N days count as open
+
+List values can be given in the environment comma-separated.
+"""
+import os
+
+import streamlit as st
+
+
+def _coerce(raw, default):
+    if isinstance(default, bool):
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, (int, float)):
+        return type(default)(raw)
+    if isinstance(default, list):
+        return [item.strip() for item in raw.split(",") if item.strip()]
+    return raw
+
+
+def setting(key, default=None):
+    env = os.environ.get(f"CRM_{key.upper()}")
+    if env is not None:
+        return _coerce(env, default)
+    try:
+        return st.secrets.get("crm", {}).get(key, default)
+    except Exception:  # no secrets.toml at all (local runs, benchmarks)
+        return default
@@ -0,0 +1,376 @@
+"""Shared, change-aware cache in front of the configured storage backend.
+
+One normalized snapshot lives per server process (``st.cache_resource``) and is
+handed to every session. The backend is only re-checked once ``cache_ttl``
+seconds have passed, and only re-read when its revision marker moved.
+
+When it did move, only the difference is pulled in: backends that stamp rows
+hand over what changed since our revision, otherwise a full read is diffed
+row by row against the last one. The changed rows are normalized and merged
+into the snapshot, and derived views are told exactly which rows came and went.
+
+With several server replicas, each write also bumps the "table" version in the
+shared state (shared.py); a replica that sees it move re-checks the backend at
+once instead of waiting out the TTL.
+"""
+import functools
+import threading
+import time
+from typing import NamedTuple
+
+import pandas as pd
+import streamlit as st
+
+from config import setting
+from perf import span
+from schema import (REQ_COLS, TIME_FORMAT, apply_changes, concat_rows, normalize, set_value,  # noqa: F401
+                    to_storage, validate)
+from shared import get_state
+from storage import (GSheetsBackend, SheetMirror, StorageUnavailable, WriteConflict, expected_values,  # noqa: F401
+                     make_backend)
+
+CACHE_TTL = setting("cache_ttl", 30)
+# A diff touching more than this share of the table is cheaper to load from scratch
+DELTA_LIMIT = 0.25
+
+
+class Delta(NamedTuple):
+    """What changed between two data versions, as typed rows indexed by record id."""
+    added: pd.DataFrame    # new records, and the new state of changed ones
+    removed: pd.DataFrame  # deleted records, and the old state of changed ones
+
+    @property
+    def appends_only(self):
+        return self.removed.empty
+
+
+def get_backend():
+    return _store()["backend"] or _configured_backend()
+
+
+def use_backend(backend):
+    """Swap in another backend for this process (benchmarks, offline runs) and drop cached data."""
+    store = _store()
+    with store["lock"]:
+        store.update(backend=backend, df=None, marker=None, checked=0.0, seen=None, views={}, delta=None,
+                     row_hashes=None, read_failed=False)
+
+
+@st.cache_resource
+def _configured_backend():
+    backend = make_backend()
+    interval = setting("sheet_sync_interval", 0)
+    if backend.stable_ids and interval:
+        if backend.revision() == 0:
+            # Fresh local database: start from what's already in the sheet
+            backend.replace(normalize(GSheetsBackend().read()))
+        SheetMirror(backend, interval).start()
+    return backend
+
+
+@st.cache_resource
+def _store():
+    return {"df": None, "marker": None, "checked": 0.0, "seen": None, "version": 0, "views": {},
+            "delta": None, "row_hashes": None, "read_failed": False, "backend": None, "lock": threading.Lock()}
+
+
+def get_data():
+    """Current task table. Treat the result as read-only: it is shared across sessions."""
+    store = _store()
+    if _fresh(store):
+        return store["df"]
+
+    with store["lock"]:
+        # Another session may have refreshed while we waited for the lock
+        if _fresh(store):
+            return store["df"]
+
+        # Read before the backend, so a write landing meanwhile is checked for next time
+        seen = get_state().version("table")
+        backend = get_backend()
+        marker = backend.revision()
+        if store["df"] is not None and marker is not None and marker == store["marker"]:
+            store["checked"], store["seen"] = time.monotonic(), seen
+            return store["df"]
+
+        try:
+            if not _pull_changes(store, backend):
+                _reload(store, backend, marker)
+        except Exception:
+            # Serve the last good snapshot rather than an empty table, and hold
+            # writes (see _require_read) until a read succeeds again
+            store["read_failed"] = True
+            return store["df"] if store["df"] is not None else normalize(pd.DataFrame(columns=REQ_COLS))
+        store["read_failed"] = False
+        store["checked"], store["seen"] = time.monotonic(), seen
+        return store["df"]
+
+
+def _fresh(store):
+    # Checked within cache_ttl, and no replica has written since
+    return (store["df"] is not None and time.monotonic() - store["checked"] < CACHE_TTL
+            and get_state().version("table") == store["seen"])
+
+
+def read_failed():
+    """Whether the last attempt to refresh from the backend failed."""
+    return _store()["read_failed"]
+
+
+def _pull_changes(store, backend):
+    """Merge what the backend says changed since our revision; False if it can't say."""
+    if store["df"] is None or store["marker"] is None:
+        return False
+    found = backend.changes(store["marker"])
+    if found is None:
+        return False
+    marker, rows, deleted = found
+    with span("data.normalize"):
+        upserts = normalize(rows)
+    _merge(store, upserts, pd.Index(deleted))
+    store["marker"] = marker
+    return True
+
+
+def _reload(store, backend, marker):
+    """Full read, merged as a row diff against the previous read when that is small."""
+    raw = backend.read()
+    with span("data.hash"):
+        # File names are nearly all distinct, so factorizing before hashing doesn't pay
+        hashes = pd.util.hash_pandas_object(raw, index=False, categorize=False)
+    if marker is None:
+        marker = int(hashes.sum())
+    old = store["row_hashes"]
+    store["row_hashes"] = hashes
+    if marker == store["marker"]:
+        return
+
+    if store["df"] is not None and old is not None:
+        common = hashes.index.intersection(old.index)
+        changed = common[hashes[common].to_numpy() != old[common].to_numpy()]
+        ids = changed.append(hashes.index.difference(old.index))
+        gone = old.index.difference(hashes.index)
+        if len(ids) + len(gone) <= DELTA_LIMIT * len(hashes):
+            with span("data.normalize"):
+                upserts = normalize(raw.loc[ids])
+            # Rows that were blanked out don't survive normalize(); they count as deleted
+            _merge(store, upserts, gone.append(ids.difference(upserts.index)))
+            store["marker"] = marker
+            return
+
+    with span("data.normalize"):
+        df = normalize(raw)
+    _publish(store, df)
+    store["marker"] = marker
+
+
+def _merge(store, upserts, deleted):
+    df = store["df"]
+    with span("data.merge"):
+        # Rows we already hold as they are (usually our own writes coming back) change nothing
+        known = upserts.index.intersection(df.index)
+        if len(known):
+            same = (to_storage(upserts.loc[known]) == to_storage(df.loc[known])).all(axis=1)
+            upserts = upserts.drop(same.index[same])
+        deleted = df.index.intersection(deleted)
+        if upserts.empty and deleted.empty:
+            return
+        removed = df.loc[upserts.index.intersection(df.index).append(deleted)]
+        _publish(store, apply_changes(df, upserts, deleted), Delta(upserts, removed))
+
+
+def data_version():
+    """Bumped whenever the snapshot changes; use it as a key for derived caches."""
+    return _store()["version"]
+
+
+def derived_view(fn=None, *, merge=None):
+    """Memoize ``fn(df, *args)`` against the data version, shared by every session.
+
+    If ``merge(old_result, delta, *args)`` is given and the cached result is
+    exactly one change behind, it is called with that change (a Delta) to patch
+    the old result instead of recomputing from the whole table; it may return
+    None to force a recompute.
+    """
+    if fn is None:
+        return functools.partial(derived_view, merge=merge)
+
+    @functools.wraps(fn)
+    def wrapper(*args):
+        store = _store()
+        df = get_data()
+        # The frame and its version as one pair (they are only published under
+        # the lock): a write landing in between would otherwise be cached under
+        # the older version, and its delta merged in a second time next call.
+        with store["lock"]:
+            version, current = store["version"], store["df"]
+        if current is not None:
+            df = current
+        key = (fn.__name__,) + args
+        hit = store["views"].get(key)
+        if hit and hit[0] == version:
+            return hit[1]
+
+        result = None
+        delta = store["delta"]
+        if hit and merge and delta and delta[0] == hit[0] and delta[1] == version:
+            with span(f"view.{fn.__name__}.merge"):
+                result = merge(hit[1], delta[2], *args)
+        if result is None:
+            with span(f"view.{fn.__name__}"):
+                result = fn(df, *args)
+        store["views"][key] = (version, result)
+        return result
+    return wrapper
+
+
+def _recheck(old, delta):
+    # Problems of untouched records stand; only the changed ones are validated again
+    kept = old.drop(delta.added.index.union(delta.removed.index), errors="ignore")
+    return pd.concat([kept, validate(delta.added)]).sort_index()
+
+
+data_issues = derived_view(validate, merge=_recheck)
+
+
+def invalidate():
+    """Force the next get_data() to read the whole table again."""
+    store = _store()
+    with store["lock"]:
+        _mark_stale(store)
+        store["marker"] = None
+
+
+def _mark_stale(store):
+    # Check on the next call; the revision check then finds what moved
+    store["checked"] = 0.0
+
+
+def _publish(store, df, delta=None):
+    # Always called under store["lock"], which derived views rely on.
+    # Derived views can patch themselves from `delta`; without one they recompute
+    store["delta"] = (store["version"], store["version"] + 1, delta) if delta is not None else None
+    store["df"] = df
+    store["version"] += 1
+
+
+def _announce(store):
+    # Other replicas see the version move and re-check on their next read
+    version = get_state().bump("table")
+    if store["seen"] == version - 1:
+        store["seen"] = version  # nothing but our own write since we last looked
+
+
+def _publish_write(store, df, delta):
+    # Serve our own write straight away. The marker is left as it was, so the
+    # next check still sees the backend move and pulls in other operators'
+    # changes; ours come back identical and are skipped. Written rows drop out
+    # of the row diff so they are always compared afresh.
+    if store["row_hashes"] is not None:
+        store["row_hashes"] = store["row_hashes"].drop(delta.added.index.union(delta.removed.index), errors="ignore")
+    _publish(store, df, delta)
+
+
+# --- WRITES ---
+# New entries are appended and edits touch only their own record, so a write
+# costs the same whatever the table size and never re-uploads other people's rows.
+# These block on the backend; outbox.py queues them for the UI instead.
+
+def _require_read(store):
+    if store["read_failed"]:
+        raise StorageUnavailable("Storage can't be read right now, so nothing was written. Please try again shortly.")
+
+
+class InvalidRows(ValueError):
+    """Records, or edits to them, that fail validation; nothing was written."""
+
+
+def _reject(problems):
+    if not problems.empty:
+        raise InvalidRows("Cannot save: " + ", ".join(problems["Problem"].unique()) + ".")
+
+
+def check_rows(rows):
+    """Typed frame of new records (list of dicts keyed by REQ_COLS); raises InvalidRows if any are invalid."""
+    new = normalize(pd.DataFrame(rows))
+    _reject(validate(new))
+    return new
+
+
+def check_changes(changes):
+    """Raises InvalidRows if any of the new values in an edit is invalid, e.g. {"Amount": -500}."""
+    problems = validate(normalize(pd.DataFrame([changes])))
+    # Only the edited columns count; problems the record already had aren't this edit's
+    _reject(problems[problems["Column"].isin(list(changes))])
+
+
+def append_rows(rows):
+    """Append new records in one backend write; raises InvalidRows if any are invalid."""
+    store = _store()
+    new = check_rows(rows)
+    with store["lock"]:
+        _require_read(store)
+        base = store["df"]
+        backend = get_backend()
+        if not backend.stable_ids and (base is None or base.empty):
+            # An empty sheet has no header row yet, so write the whole frame once
+            backend.replace(concat_rows(normalize(backend.read()), new))
+            ids = None
+        else:
+            ids = backend.append(new)
+        _announce(store)
+        if ids is None or base is None:
+            _mark_stale(store)
+            return
+        new.index = ids
+        _publish_write(store, concat_rows(base, new), Delta(new, base.iloc[:0]))
+
+
+def update_record(idx, changes, expected=None):
+    """Overwrite only the given columns of one record, e.g. {"Amount": 500}.
+
+    `expected` is the record as the caller saw it (see storage.expected_values;
+    default: our snapshot). Raises WriteConflict if it has changed since, and
+    InvalidRows if a new value is invalid.
+    """
+    check_changes(changes)
+    store = _store()
+    with store["lock"]:
+        _require_read(store)
+        if expected is None:
+            expected = expected_values(store["df"].loc[idx], changes)
+        try:
+            get_backend().update(idx, changes, expected)
+        except WriteConflict:
+            _mark_stale(store)
+            raise
+        _announce(store)
+        if idx not in store["df"].index:
+            _mark_stale(store)
+            return
+        df = store["df"].copy()
+        for col, val in changes.items():
+            set_value(df, idx, col, val)
+        _publish_write(store, df, Delta(df.loc[[idx]], store["df"].loc[[idx]]))
+
+
+def delete_record(idx, expected=None):
+    """Remove one record; `expected` as for update_record()."""
+    store = _store()
+    with store["lock"]:
+        _require_read(store)
+        backend = get_backend()
+        if expected is None:
+            expected = expected_values(store["df"].loc[idx])
+        try:
+            backend.delete(idx, expected)
+        except WriteConflict:
+            _mark_stale(store)
+            raise
+        _announce(store)
+        if backend.stable_ids and idx in store["df"].index:
+            df = store["df"]
+            _publish_write(store, df.drop(idx), Delta(df.iloc[:0], df.loc[[idx]]))
+        else:
+            # Later sheet rows shift up; the next read's row diff renumbers them
+            _mark_stale(store)
@@ -0,0 +1,87 @@
+"""Bulk intake for the Dispatch Console.
+
+A batch is a list of new-task rows built from uploaded files and/or a CSV
+manifest. It is checked as a whole, routed round-robin from the queue's
+current position with one counter claim, and queued for saving as one append.
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from data import check_rows
+from outbox import action_key, append_rows, ensure_new
+from routing import claim_writers, upcoming_writers
+from schema import TIME_FORMAT
+
+# Manifest columns the console understands; whatever a row leaves out takes the form's values
+MANIFEST_COLS = ["Task / File", "Work Category", "Amount", "Priority", "Payment Status"]
+ALIASES = {"file": "Task / File", "file name": "Task / File", "filename": "Task / File", "task": "Task / File",
+           "category": "Work Category", "status": "Payment Status", "payment": "Payment Status"}
+
+
+def _column_name(header):
+    key = header.strip().lower()
+    for col in MANIFEST_COLS:
+        if key == col.lower():
+            return col
+    return ALIASES.get(key, header.strip())
+
+
+def read_manifest(file):
+    """The manifest's known columns as text; raises ValueError if it can't be used."""
+    if hasattr(file, "seek"):
+        file.seek(0)  # Streamlit hands back the same upload on every rerun
+    manifest = pd.read_csv(file, dtype=str, keep_default_na=False, skipinitialspace=True)
+    manifest.columns = [_column_name(c) for c in manifest.columns]
+    if "Task / File" not in manifest.columns:
+        raise ValueError("The manifest needs a file name column (\"Task / File\").")
+    manifest = manifest[[c for c in MANIFEST_COLS if c in manifest.columns]]
+    manifest = manifest[manifest["Task / File"].str.strip() != ""]
+    if "Amount" in manifest.columns:
+        amount = manifest["Amount"].str.replace(",", "").str.strip()
+        bad = (amount != "") & pd.to_numeric(amount, errors="coerce").isna()
+        if bad.any():
+            raise ValueError(f"Manifest amounts must be numbers (check {', '.join(manifest.loc[bad, 'Task / File'][:3])}).")
+        manifest["Amount"] = amount
+    return manifest
+
+
+def batch_rows(names, manifest=None, defaults=None):
+    """One row per task: manifest rows first, then uploaded files the manifest doesn't list."""
+    defaults = defaults or {}
+    rows = []
+    if manifest is not None:
+        for rec in manifest.to_dict("records"):
+            rows.append({**defaults, **{col: val for col, val in rec.items() if val != ""}})
+    listed = {row["Task / File"] for row in rows}
+    rows += [{**defaults, "Task / File": name} for name in names if name not in listed]
+    return rows
+
+
+def preview(rows):
+    """The batch as a table, with who each task would go to if confirmed now."""
+    table = pd.DataFrame(rows, columns=MANIFEST_COLS)
+    table.insert(1, "Assigned To", upcoming_writers("New Task", len(rows), [row.get("Priority") for row in rows]))
+    return table
+
+
+def upload_key(*files):
+    """Idempotency key for a submission made from these uploads; every upload gets a new file id."""
+    return action_key("upload", *sorted(f.file_id for f in files if f is not None))
+
+
+def dispatch(rows, key):
+    """Assign a batch of new tasks and queue it as one write; returns the writers in row order.
+
+    `key` identifies the submission (see upload_key); raises outbox.AlreadySubmitted if it was seen before.
+    """
+    ts = datetime.now().strftime(TIME_FORMAT)
+    batch = [{**row, "Type": "New Task", "Time": ts} for row in rows]
+    # Check before claiming so a bad or repeated batch doesn't use up queue positions
+    ensure_new(key)
+    check_rows(batch)
+    writers = claim_writers("New Task", len(batch), [row.get("Priority") for row in batch])
+    for row, writer in zip(batch, writers):
+        row["Assigned To"] = writer
+    append_rows(batch, key)
+    return writers
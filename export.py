@@ -0,0 +1,90 @@
+"""Task exports for any date range and filters, built only when downloaded.
+
+Matching rows are picked as positions into the shared snapshot (no copy) and
+written out CHUNK_ROWS at a time straight into the output stream, so the only
+full-size object is the finished, optionally compressed, file itself.
+"""
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from schema import REQ_COLS, to_storage
+
+CHUNK_ROWS = 50_000
+# label -> (file extension, mime type)
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def select(df, start=None, end=None, filters=None):
+    """Positions of rows timed within [start, end] (dates, both inclusive) that pass every filter.
+
+    `filters` maps a categorical column to a value or a list of values; empty means no filter.
+    """
+    keep = np.ones(len(df), dtype=bool)
+    times = df["Time"].to_numpy()
+    if start is not None:
+        keep &= times >= np.datetime64(pd.Timestamp(start))
+    if end is not None:
+        keep &= times < np.datetime64(pd.Timestamp(end) + pd.Timedelta(days=1))
+    for col, values in (filters or {}).items():
+        if values is None or len(values) == 0:
+            continue
+        values = [values] if isinstance(values, str) else values
+        # Compare category codes, like the record browser does
+        cats = df[col].cat.categories
+        codes = [cats.get_loc(v) for v in values if v in cats]
+        keep &= np.isin(df[col].cat.codes.to_numpy(), codes)
+    return np.flatnonzero(keep)
+
+
+def _chunks(df, positions):
+    for first in range(0, len(positions), CHUNK_ROWS):
+        yield df.iloc[positions[first:first + CHUNK_ROWS]]
+
+
+def _write_csv(df, positions, out):
+    header = True
+    for chunk in _chunks(df, positions):
+        out.write(to_storage(chunk).to_csv(index=False, header=header).encode("utf-8"))
+        header = False
+    if header:
+        out.write(to_storage(df.iloc[:0]).to_csv(index=False).encode("utf-8"))
+
+
+def _write_parquet(df, positions, out):
+    # Typed columns (real timestamps, integer amounts, dictionary-encoded enums) for the accountants' tools
+    schema = pa.Schema.from_pandas(df[REQ_COLS].iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(out, schema, compression="zstd") as writer:
+        for chunk in _chunks(df, positions):
+            writer.write_table(pa.Table.from_pandas(chunk[REQ_COLS], schema=schema, preserve_index=False))
+
+
+def export_file(df, positions=None, fmt="CSV"):
+    """The selected rows of `df` as a file in one of FORMATS: a BytesIO, rewound to the start."""
+    if positions is None:
+        positions = np.arange(len(df))
+    out = io.BytesIO()
+    if fmt == "Parquet":
+        _write_parquet(df, positions, out)
+    elif fmt == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=out, mode="wb", mtime=0) as gz:
+            _write_csv(df, positions, gz)
+    else:
+        _write_csv(df, positions, out)
+    # st.download_button takes the bytes out with getvalue() itself, so the file is
+    # copied once either way; rewound for callers that read() it instead
+    out.seek(0)
+    return out
+
+
+def exporter(df, fmt="CSV", start=None, end=None, filters=None):
+    """A no-argument callable producing the export, for st.download_button's deferred `data`."""
+    return lambda: export_file(df, select(df, start, end, filters), fmt)
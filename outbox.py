@@ -0,0 +1,393 @@
+"""Write-behind queue between the UI and the storage backend.
+
+A save is journaled to a local SQLite file and acknowledged straight away; a
+background thread then replays the journal against the backend in order, so a
+slow or unreachable Google Sheet never holds up dispatch, and a restart in
+between loses nothing (the journal is picked up again on start).
+
+* Consecutive appends are flushed as one backend write (up to BATCH_ROWS rows).
+* A failed flush is retried with exponential backoff, RETRY_BASE doubling up to
+  RETRY_MAX seconds. Later entries wait behind it so writes land in order.
+* Every entry has an idempotency key taken from the user action that made it
+  (the upload, the form), so submitting the same action twice raises
+  AlreadySubmitted instead of queuing it again. Keys are kept for SENT_KEEP
+  seconds after they were written. An entry being retried is first checked
+  against a fresh read, so a write that reached the backend before the error
+  isn't applied twice.
+* Edits and deletes name their record by id, which on Sheets is the row
+  position; a delete written ahead of them moves it, so a row that no longer
+  matches is looked up again by its values before counting as a conflict.
+* Several replicas may share one journal file (``outbox_path``); they flush
+  it in turns under the shared "outbox" lock, so for that the shared state
+  has to be shared too (``shared_state`` "sqlite" or "redis", see shared.py).
+  A batch that takes longer than the lock's LOCK_TTL could be sent twice, so
+  replicas that can't share the state need a journal each.
+* Nothing is flushed while the last read from the backend failed; the data
+  layer won't write over a table it can't see (StorageUnavailable).
+* Entries the backend rejects for good (a conflicting edit, invalid rows) move
+  to the ``failed`` table for the admin to see instead of blocking the queue.
+
+``append_rows``, ``update_record`` and ``delete_record`` here take the same
+arguments as their data.py counterparts, plus the key. With
+``write_behind = false`` they write through synchronously (keys still count).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import streamlit as st
+
+import data
+from config import setting
+from data import InvalidRows
+from schema import as_text, to_storage
+from shared import get_state
+from storage import KEY_COLS, StorageUnavailable, WriteConflict, expected_values
+
+WRITE_BEHIND = setting("write_behind", True)
+BATCH_ROWS = 500
+RETRY_BASE = 2    # seconds before the first retry
+RETRY_MAX = 300
+POLL = 1.0        # how often the flusher looks for due retries
+SENT_KEEP = 86400  # seconds a written entry's key still counts as submitted
+# Errors retrying won't fix
+PERMANENT = (WriteConflict, InvalidRows)
+
+
+class AlreadySubmitted(Exception):
+    """An entry with this key was queued, written or rejected before."""
+
+
+class Journal:
+    """The on-disk queue: pending entries in submission order, plus the keys already written and the entries that failed for good."""
+
+    def __init__(self, path):
+        # One connection shared by the UI threads and the flusher, serialized by a lock
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL UNIQUE, op TEXT NOT NULL,
+                payload TEXT NOT NULL, created REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,
+                next_try REAL NOT NULL DEFAULT 0, error TEXT)""")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS failed (
+                key TEXT PRIMARY KEY, op TEXT NOT NULL, payload TEXT NOT NULL, created REAL NOT NULL,
+                failed REAL NOT NULL, error TEXT)""")
+            self.db.execute("CREATE TABLE IF NOT EXISTS sent (key TEXT PRIMARY KEY, sent REAL NOT NULL)")
+
+    def add(self, key, op, payload):
+        """Journal an entry; False if the key is already queued, written or failed."""
+        with self.lock, self.db:
+            if self._settled(key):
+                return False
+            cur = self.db.execute("INSERT OR IGNORE INTO outbox (key, op, payload, created) VALUES (?, ?, ?, ?)",
+                                  (key, op, json.dumps(payload), time.time()))
+            return cur.rowcount == 1
+
+    def head(self, limit):
+        """The oldest pending entries, in order."""
+        with self.lock:
+            rows = self.db.execute("SELECT key, op, payload, attempts, next_try FROM outbox ORDER BY seq LIMIT ?",
+                                   (limit,)).fetchall()
+        return [{"key": k, "op": op, "payload": json.loads(p), "attempts": a, "next_try": t}
+                for k, op, p, a, t in rows]
+
+    def holds(self, key):
+        with self.lock:
+            return self._settled(key) or bool(self.db.execute("SELECT 1 FROM outbox WHERE key = ?", (key,)).fetchone())
+
+    def _settled(self, key):
+        return bool(self.db.execute("SELECT 1 FROM sent WHERE key = ? UNION ALL SELECT 1 FROM failed WHERE key = ?",
+                                    (key, key)).fetchone())
+
+    def done(self, keys):
+        """The entries were written: drop them from the queue, but remember their keys for a while."""
+        now = time.time()
+        with self.lock, self.db:
+            self.db.executemany("DELETE FROM outbox WHERE key = ?", [(k,) for k in keys])
+            self.db.executemany("INSERT OR REPLACE INTO sent VALUES (?, ?)", [(k, now) for k in keys])
+            self.db.execute("DELETE FROM sent WHERE sent < ?", (now - SENT_KEEP,))
+
+    def retry(self, keys, error):
+        """Count a failed attempt and push the entries' next try back exponentially."""
+        with self.lock, self.db:
+            for key in keys:
+                self.db.execute("""UPDATE outbox SET attempts = attempts + 1, error = ?,
+                                   next_try = ? + min(?, ? * (1 << attempts)) WHERE key = ?""",
+                                (error, time.time(), RETRY_MAX, RETRY_BASE, key))
+
+    def fail(self, key, error):
+        with self.lock, self.db:
+            self.db.execute("""INSERT OR REPLACE INTO failed SELECT key, op, payload, created, ?, ?
+                               FROM outbox WHERE key = ?""", (time.time(), error, key))
+            self.db.execute("DELETE FROM outbox WHERE key = ?", (key,))
+
+    def pending(self):
+        with self.lock:
+            return self.db.execute("SELECT count(*) FROM outbox").fetchone()[0]
+
+    def pending_appends(self):
+        """Rows of the appends still waiting to be written, in submission order."""
+        with self.lock:
+            payloads = self.db.execute("SELECT payload FROM outbox WHERE op = 'append' ORDER BY seq").fetchall()
+        return [row for (payload,) in payloads for row in json.loads(payload)["rows"]]
+
+    def failures(self):
+        with self.lock:
+            rows = self.db.execute("SELECT key, op, payload, failed, error FROM failed ORDER BY failed").fetchall()
+        return [{"key": k, "op": op, "payload": json.loads(p), "failed": t, "error": e} for k, op, p, t, e in rows]
+
+    def dismiss(self, key):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM failed WHERE key = ?", (key,))
+
+
+class Flusher(threading.Thread):
+    """Replays the journal against the backend; woken on every submit, otherwise polls for retries."""
+
+    def __init__(self, journal):
+        super().__init__(daemon=True, name="outbox-flush")
+        self.journal = journal
+        self.wake = threading.Event()
+
+    def run(self):
+        while True:
+            self.wake.wait(POLL)
+            self.wake.clear()
+            try:
+                flush(self.journal)
+            except Exception:
+                pass  # the journal still holds everything; try again next round
+
+
+@st.cache_resource
+def get_journal():
+    return Journal(setting("outbox_path", os.path.join(os.path.dirname(os.path.abspath(__file__)), "writewise-outbox.db")))
+
+
+@st.cache_resource
+def _flusher():
+    flusher = Flusher(get_journal())
+    flusher.start()
+    return flusher
+
+
+def start():
+    """Start writing the journal in the background, once per process; reading it never does."""
+    _flusher()
+
+
+# --- FLUSHING ---
+
+_flush_lock = threading.Lock()
+
+
+def flush(journal=None):
+    """Send every entry that is due, oldest first; stops at the first one that has to wait."""
+    journal = journal or get_journal()
+    while True:
+        # Replicas sharing the journal file take turns batch by batch, and read
+        # the head only once it is their turn, so each entry is sent once
+        with _flush_lock, get_state().lock("outbox"):
+            entries = journal.head(BATCH_ROWS)
+            if not entries or entries[0]["next_try"] > time.time():
+                return
+            data.get_data()
+            if data.read_failed():
+                return  # wait for a good read before writing anything
+            if not _send(journal, _batch(entries)):
+                return
+
+
+def _send(journal, batch):
+    """Write one batch and settle its entries; False if it has to be retried later."""
+    keys = [entry["key"] for entry in batch]
+    try:
+        _apply(batch)
+    except PERMANENT as e:
+        if len(batch) == 1:
+            journal.fail(keys[0], str(e))
+            return True
+        # Rejected as a whole: send the entries one at a time to find the bad one
+        return all(_send(journal, [entry]) for entry in batch)
+    except Exception as e:
+        journal.retry(keys, str(e) or type(e).__name__)
+        return False
+    journal.done(keys)
+    return True
+
+
+def _batch(entries):
+    """The head entry, plus the appends directly behind it if it is an append."""
+    if entries[0]["op"] != "append":
+        return entries[:1]
+    batch, rows = [], 0
+    for entry in entries:
+        if entry["op"] != "append":
+            break
+        rows += len(entry["payload"]["rows"])
+        if batch and rows > BATCH_ROWS:
+            break
+        batch.append(entry)
+    return batch
+
+
+def _apply(batch):
+    retried = any(entry["attempts"] for entry in batch)
+    op, payload = batch[0]["op"], batch[0]["payload"]
+    if op == "append":
+        rows = [row for entry in batch for row in entry["payload"]["rows"]]
+        if retried:
+            rows = _not_yet_saved(rows)
+        if rows:
+            data.append_rows(rows)
+    elif op == "update":
+        if not (retried and _already_updated(payload)):
+            _write_moved(data.update_record, payload, payload["changes"])
+    elif op == "delete":
+        if not (retried and _already_deleted(payload)):
+            _write_moved(data.delete_record, payload)
+
+
+def _write_moved(write, payload, *args):
+    # Queued edits point at a row position. On Sheets every delete written ahead
+    # of them moves the rows below it up one, so before calling it a conflict,
+    # look for the record where it is now.
+    try:
+        write(payload["idx"], *args, payload["expected"])
+    except WriteConflict:
+        if data.get_backend().stable_ids:
+            raise
+        found = _find(_fresh(), payload["expected"])
+        if len(found) != 1:
+            raise
+        write(found[0], *args, payload["expected"])
+
+
+# A failed attempt may still have reached the backend (e.g. a timeout after the
+# write went through), so a retry first looks at what is actually stored.
+
+def _fresh():
+    data.invalidate()
+    df = data.get_data()
+    if data.read_failed():
+        raise StorageUnavailable("Storage can't be read to check an earlier attempt.")
+    return df
+
+
+def _not_yet_saved(rows):
+    cols = KEY_COLS + ["Assigned To"]
+    stored = set(to_storage(_fresh())[cols].itertuples(index=False, name=None))
+    return [row for row in rows if tuple(row[c] for c in cols) not in stored]
+
+
+def _holds(df, idx, values):
+    return idx in df.index and all(str(as_text(df.at[idx, c])) == str(v) for c, v in values.items())
+
+
+def _find(df, values):
+    """Ids of the records holding `values`; the file name narrows the search first."""
+    candidates = df.index[df["Task / File"].astype(str) == str(values["Task / File"])]
+    return [idx for idx in candidates if _holds(df, idx, values)]
+
+
+def _located(df, payload, values):
+    # Where the record could be: its own id, or anywhere on Sheets (see _write_moved)
+    if data.get_backend().stable_ids:
+        return [payload["idx"]] if _holds(df, payload["idx"], values) else []
+    return _find(df, values)
+
+
+def _already_updated(payload):
+    keys = {c: payload["expected"][c] for c in KEY_COLS}
+    return bool(_located(_fresh(), payload, {**keys, **payload["changes"]}))
+
+
+def _already_deleted(payload):
+    return not _located(_fresh(), payload, payload["expected"])
+
+
+# --- SUBMITTING ---
+
+def action_key(*parts):
+    """Idempotency key for a user action, from whatever identifies it (upload ids, a record and the change)."""
+    return hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def ensure_new(key):
+    """Raise AlreadySubmitted for a key seen before, e.g. before claiming writers for it."""
+    if get_journal().holds(key):
+        raise AlreadySubmitted(key)
+
+
+def _submit(op, payload, key):
+    if not get_journal().add(key, op, payload):
+        raise AlreadySubmitted(key)
+    _flusher().wake.set()
+
+
+def _write_through(key, write, *args):
+    # Synchronous writes go by the same keys, so a repeated submit is still caught
+    ensure_new(key)
+    write(*args)
+    get_journal().done([key])
+
+
+def append_rows(rows, key):
+    """Queue new records; raises InvalidRows at once if any are invalid, AlreadySubmitted for a known key."""
+    if not WRITE_BEHIND:
+        return _write_through(key, data.append_rows, rows)
+    new = data.check_rows(rows)
+    stored = [{c: as_text(v) for c, v in row.items()} for row in to_storage(new).to_dict("records")]
+    _submit("append", {"rows": stored}, key)
+
+
+def update_record(idx, changes, key, expected=None):
+    """Queue an edit of one record.
+
+    `expected` is the record as the user saw it (see storage.expected_values;
+    default: our snapshot now); the edit is rejected if it has changed since.
+    Raises InvalidRows at once if a new value is invalid.
+    """
+    data.check_changes(changes)
+    if expected is None:
+        expected = expected_values(data.get_data().loc[idx], changes)
+    if not WRITE_BEHIND:
+        return _write_through(key, data.update_record, idx, changes, expected)
+    changes = {c: as_text(v) for c, v in changes.items()}
+    _submit("update", {"idx": int(idx), "changes": changes, "expected": expected}, key)
+
+
+def delete_record(idx, key, expected=None):
+    """Queue the removal of one record, checked like update_record()."""
+    if expected is None:
+        expected = expected_values(data.get_data().loc[idx])
+    if not WRITE_BEHIND:
+        return _write_through(key, data.delete_record, idx, expected)
+    _submit("delete", {"idx": int(idx), "expected": expected}, key)
+
+
+def describe(entry):
+    """Short label for a journal entry, e.g. "Add report.docx"."""
+    payload = entry["payload"]
+    if entry["op"] == "append":
+        names = [row["Task / File"] for row in payload["rows"]]
+        return "Add " + ", ".join(names[:3]) + (f" and {len(names) - 3} more" if len(names) > 3 else "")
+    return f"{'Edit' if entry['op'] == 'update' else 'Delete'} {payload['expected']['Task / File']}"
+
+
+def pending_rows():
+    """New records accepted but not written yet, as text rows (see to_storage)."""
+    return get_journal().pending_appends() if WRITE_BEHIND else []
+
+
+def status():
+    """(entries waiting to be written, entries the backend rejected) for display."""
+    if not WRITE_BEHIND:
+        return 0, []
+    journal = get_journal()
+    return journal.pending(), journal.failures()
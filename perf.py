@@ -0,0 +1,207 @@
+"""Per-rerun timings and backend call counts.
+
+Off unless ``metrics = true`` is set in the config. When off, every hook here
+returns straight away and the decorators hand back the undecorated function,
+so nothing is measured and nothing is slower.
+
+When on, each rerun is split into top-level stages by ``lap()`` (time since
+the previous lap), with finer spans (``timed`` / ``span``: backend calls,
+normalization, derived views, chart building) recorded alongside under dotted
+names. ``paint()`` marks when the page's first content went out, which is as
+close to time to first paint as the server can see (Streamlit streams each
+element to the browser as it is produced). Finished reruns go to a bounded
+process-wide history for the Diagnostics page, and out as one JSON line each on
+the ``writewise.metrics`` logger (plus ``metrics_file`` if set).
+"""
+import collections
+import contextlib
+import functools
+import json
+import logging
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from config import setting
+
+ENABLED = setting("metrics", False)
+METRICS_FILE = setting("metrics_file", "")
+HISTORY = 500
+
+log = logging.getLogger("writewise.metrics")
+# Streamlit runs every rerun of a session on that session's script thread
+_current = threading.local()
+_OFF = contextlib.nullcontext()
+
+
+@st.cache_resource
+def _recorder():
+    return {"reruns": collections.deque(maxlen=HISTORY), "calls": collections.Counter(), "lock": threading.Lock()}
+
+
+def _record():
+    return getattr(_current, "record", None)
+
+
+def _add(name, seconds):
+    rec = _record()
+    if rec is not None:
+        rec["ms"][name] = rec["ms"].get(name, 0.0) + seconds * 1000
+
+
+# --- RERUN LIFECYCLE ---
+
+def session_id():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id[:8] if ctx else "-"
+
+
+def begin():
+    """Start timing a rerun; call first thing in the script."""
+    if not ENABLED:
+        return
+    if _record() is not None:
+        # The last rerun was cut short (st.rerun, st.stop); keep what it measured
+        _finish(interrupted=True)
+    _current.record = {"ts": time.time(), "session": session_id(), "page": None,
+                       "ms": {}, "calls": {}, "paint_ms": None, "interrupted": False}
+    _current.mark = _current.start = time.perf_counter()
+
+
+def lap(name):
+    """Close the current top-level stage under `name` and start the next one."""
+    if not ENABLED or _record() is None:
+        return
+    now = time.perf_counter()
+    _add(name, now - _current.mark)
+    _current.mark = now
+
+
+def paint():
+    """Note that the page's first content has been sent (first call per rerun counts)."""
+    rec = _record() if ENABLED else None
+    if rec is not None and rec["paint_ms"] is None:
+        rec["paint_ms"] = (time.perf_counter() - _current.start) * 1000
+
+
+def end(page, last_stage="page"):
+    """Close the final stage and publish the rerun."""
+    if not ENABLED or _record() is None:
+        return
+    lap(last_stage)
+    _current.record["page"] = page
+    _finish()
+
+
+def _finish(interrupted=False):
+    rec = _current.record
+    _current.record = None
+    rec["total_ms"] = (time.perf_counter() - _current.start) * 1000
+    rec["interrupted"] = interrupted
+    store = _recorder()
+    with store["lock"]:
+        store["reruns"].append(rec)
+    line = json.dumps(rec, default=str)
+    log.info(line)
+    if METRICS_FILE:
+        with open(METRICS_FILE, "a") as fh:
+            fh.write(line + "\n")
+
+
+# --- SPANS ---
+
+def span(name):
+    """Context manager timing a block under `name`."""
+    if not ENABLED:
+        return _OFF
+    return _span(name)
+
+
+@contextlib.contextmanager
+def _span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator form of span(); a no-op when metrics are off."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def backend_call(fn):
+    """Time a storage backend method and count it as one API call."""
+    if not ENABLED:
+        return fn
+    op = fn.__name__
+    timer = timed(f"backend.{op}")(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        rec = _record()
+        if rec is not None:
+            rec["calls"][op] = rec["calls"].get(op, 0) + 1
+        store = _recorder()
+        with store["lock"]:
+            store["calls"][op] += 1
+        return timer(*args, **kwargs)
+    return wrapper
+
+
+# --- READING IT BACK ---
+
+def history():
+    """Finished reruns, oldest first (a copy)."""
+    store = _recorder()
+    with store["lock"]:
+        return list(store["reruns"])
+
+
+def process_calls():
+    """Backend calls made by this process since start, by operation (includes background threads)."""
+    store = _recorder()
+    with store["lock"]:
+        return dict(store["calls"])
+
+
+def stage_stats(reruns):
+    """Median / p95 / max milliseconds per stage over `reruns`, slowest median first."""
+    ms = pd.DataFrame([rec["ms"] for rec in reruns])
+    if ms.empty:
+        return pd.DataFrame(columns=["Stage", "Reruns", "Median ms", "p95 ms", "Max ms"])
+    stats = pd.DataFrame({"Reruns": ms.count(), "Median ms": ms.median(), "p95 ms": ms.quantile(0.95), "Max ms": ms.max()})
+    return stats.sort_values("Median ms", ascending=False).rename_axis("Stage").reset_index()
+
+
+def paint_stats(reruns):
+    """Median / p95 time to first paint per page over `reruns`."""
+    paints = pd.DataFrame([(rec["page"], rec["paint_ms"]) for rec in reruns if rec.get("paint_ms") is not None],
+                          columns=["Page", "ms"])
+    by_page = paints.groupby("Page")["ms"]
+    return pd.DataFrame({"Reruns": by_page.count(), "Median ms": by_page.median(), "p95 ms": by_page.quantile(0.95)}).reset_index()
+
+
+def calls_by_session(reruns):
+    """Backend calls per session and operation over `reruns`."""
+    calls = pd.DataFrame([{"Session": rec["session"], **rec["calls"]} for rec in reruns])
+    if calls.empty:
+        return calls
+    return calls.groupby("Session").sum().astype(int)
+
+
+def export_jsonl(reruns):
+    return "".join(json.dumps(rec, default=str) + "\n" for rec in reruns)
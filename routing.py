@@ -0,0 +1,142 @@
+"""Writer assignment: round-robin or least-loaded, over a configurable roster.
+
+Each queue keeps a persisted position counter in the storage backend, so
+picking the next writer is a single lookup instead of a recount of the table.
+The counter is only rebuilt from the data when it is missing.
+
+In "workload" mode the least loaded active writer gets the task, where load is
+the priority-weighted number of tasks each writer was given in the last
+``load_window_days``. Load comes from a small per-day table that is patched
+with each change to the data, plus the appends still queued in the outbox,
+and ties go round-robin from the queue counter.
+
+The roster, paused writers, mode and load window are read from the settings
+on every routing decision, so changing them needs no restart.
+"""
+import pandas as pd
+
+from config import setting
+from data import StorageUnavailable, derived_view, get_backend, get_data, read_failed
+from outbox import pending_rows
+from schema import normalize
+
+ROUTING_MODES = ["round_robin", "workload"]
+PRIORITY_WEIGHTS = {"Normal": 1, "High": 2, "Urgent": 3}
+
+
+def queues():
+    """Each queue's writers in routing order, paused ones included."""
+    return {"New Task": setting("new_task_writers", ["Muhammad Imran", "Mazhar Abbas", "Muhammad Ahmad"]),
+            "Revision": setting("revision_writers", ["Muhammad Ahmad", "Mazhar Abbas", "Muhammad Imran"])}
+
+
+def paused():
+    return set(setting("paused_writers", []))
+
+
+def routing_mode():
+    mode = setting("routing", "round_robin")
+    if mode not in ROUTING_MODES:
+        raise ValueError(f"Unknown routing mode: {mode!r}")
+    return mode
+
+
+def load_window_days():
+    return setting("load_window_days", 3)
+
+
+def roster(queue):
+    """Writers the queue routes to right now, in queue order (paused writers left out)."""
+    skip = paused()
+    active = [w for w in queues()[queue] if w not in skip]
+    if not active:
+        raise ValueError(f"Every writer in the {queue} queue is paused.")
+    return active
+
+
+# --- WORKLOAD INDEX ---
+
+def daily_load(df):
+    """Priority-weighted task count per (day, writer)."""
+    weight = df["Priority"].map(PRIORITY_WEIGHTS).astype(float).fillna(1)
+    keys = [df["Time"].dt.normalize().rename("Day"), df["Assigned To"].astype(object)]
+    return weight.groupby(keys, observed=True).sum().rename("Load")
+
+
+def _apply_load(old, delta):
+    parts = [old, daily_load(delta.added)] + ([] if delta.appends_only else [-daily_load(delta.removed)])
+    both = pd.concat(parts).groupby(level=[0, 1]).sum()
+    return both[both != 0]
+
+
+writer_load_by_day = derived_view(daily_load, merge=_apply_load)
+
+
+def writer_loads(writers, now=None):
+    """Open load per writer: weighted tasks since the start of the load window, queued ones included."""
+    since = pd.Timestamp(now or pd.Timestamp.now()).normalize() - pd.Timedelta(days=load_window_days() - 1)
+    tables = [writer_load_by_day()]
+    queued = pending_rows()
+    if queued:
+        # Not in the data until the outbox writes them, but already their writers' work
+        tables.append(daily_load(normalize(pd.DataFrame(queued))))
+    loads = pd.Series(0.0, index=pd.Index(writers, dtype=object))
+    for table in tables:
+        recent = table[table.index.get_level_values("Day") >= since]
+        loads = loads.add(recent.groupby(level=1).sum(), fill_value=0)
+    return loads.reindex(writers).to_dict()
+
+
+def _pick(active, first, priorities):
+    """Writers for consecutive slots starting at counter value `first`."""
+    if routing_mode() == "round_robin":
+        return [active[(first + i) % len(active)] for i in range(len(priorities))]
+    loads = writer_loads(active)
+    picked = []
+    for i, priority in enumerate(priorities):
+        # Rotate so ties fall to whoever round-robin would pick next
+        start = (first + i) % len(active)
+        rotation = active[start:] + active[:start]
+        writer = min(rotation, key=loads.get)
+        loads[writer] += PRIORITY_WEIGHTS.get(priority, 1)
+        picked.append(writer)
+    return picked
+
+
+# --- ASSIGNMENT ---
+
+def _position(backend, queue, claiming=False):
+    pos = backend.counter(queue)
+    if pos is None:
+        df = get_data()
+        seed = int((df["Type"] == queue).sum())
+        if read_failed():
+            # A count of the table we couldn't read would stick for good: show it, but don't save it
+            if claiming:
+                raise StorageUnavailable("Storage can't be read right now, so no writer was assigned. Please try again shortly.")
+            return seed
+        pos = backend.init_counter(queue, seed)
+    return pos
+
+
+def next_writer(queue, priority="Normal"):
+    """Who the queue will route to next (display only; may be taken by another session)."""
+    return upcoming_writers(queue, 1, [priority])[0]
+
+
+def upcoming_writers(queue, n, priorities=None):
+    """Who the next `n` slots would go to (display only, like next_writer)."""
+    return _pick(roster(queue), _position(get_backend(), queue), priorities or ["Normal"] * n)
+
+
+def claim_writer(queue, priority="Normal"):
+    """Atomically take the next slot in the queue and return its writer."""
+    return claim_writers(queue, 1, [priority])[0]
+
+
+def claim_writers(queue, n, priorities=None):
+    """Atomically take the next `n` slots in one go; their writers, in order."""
+    backend = get_backend()
+    active = roster(queue)
+    _position(backend, queue, claiming=True)
+    return _pick(active, backend.claim_counter(queue, n), priorities or ["Normal"] * n)
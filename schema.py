@@ -0,0 +1,125 @@
+"""Column layout and typing of the task table.
+
+Storage keeps everything as text (``Time`` in TIME_FORMAT); in memory the
+table is typed once at load: categoricals for the enum-like columns, a
+datetime64 ``Time`` and an integer ``Amount``.
+"""
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+REQ_COLS = ["Task / File", "Type", "Assigned To", "Time", "Work Category", "Amount", "Payment Status", "Priority"]
+TIME_FORMAT = "%d-%b-%Y %H:%M"
+
+# Known values come first so their category codes are stable; anything else
+# found in the data is added after them (and reported by validate()).
+ENUMS = {
+    "Type": ["New Task", "Revision"],
+    "Work Category": ["Assignment", "Article", "Copywriting", "Other", "Revision"],
+    "Payment Status": ["Pending", "Received", "N/A"],
+    "Priority": ["Normal", "High", "Urgent"],
+}
+CATEGORICAL = list(ENUMS) + ["Assigned To"]
+
+
+def _parse_time(col):
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col
+    text = col.astype(str).str.strip()
+    parsed = pd.to_datetime(text, format=TIME_FORMAT, errors="coerce")
+    # Cells the sheet re-formatted on its own get a second, slower chance:
+    # ISO first, then the day-first local style
+    for fmt in ("ISO8601", "mixed"):
+        retry = parsed.isna() & col.notna() & (text != "")
+        if not retry.any():
+            break
+        parsed[retry] = pd.to_datetime(text[retry], format=fmt, dayfirst=True, errors="coerce")
+    return parsed.astype("datetime64[ns]")
+
+
+def _categorical(col, known=()):
+    text = col.astype(str).str.strip().replace("", pd.NA)
+    extra = sorted(set(text.dropna().unique()) - set(known))
+    return pd.Categorical(text, categories=list(known) + extra)
+
+
+def normalize(raw):
+    df = raw.copy()
+    for col in REQ_COLS:
+        if col not in df.columns: df[col] = "" if col != "Amount" else 0
+    df = df[REQ_COLS].dropna(how="all")
+    df["Task / File"] = df["Task / File"].astype(str)
+    df["Time"] = _parse_time(df["Time"])
+    df["Amount"] = pd.to_numeric(df["Amount"], errors="coerce").fillna(0).round().astype("int64")
+    for col in CATEGORICAL:
+        df[col] = _categorical(df[col], ENUMS.get(col, ()))
+    return df
+
+
+def _widen(base, new):
+    # Shared categories, so combining never falls back to object columns
+    base, new = base.copy(deep=False), new.copy(deep=False)
+    for col in CATEGORICAL:
+        cats = base[col].cat.categories.union(new[col].cat.categories, sort=False)
+        base[col] = base[col].cat.set_categories(cats)
+        new[col] = new[col].cat.set_categories(cats)
+    return base, new
+
+
+def concat_rows(base, new):
+    """Append typed rows, widening categories instead of falling back to object columns."""
+    return pd.concat(_widen(base, new))
+
+
+def apply_changes(base, upserts, deleted=()):
+    """`base` with `upserts` written over the records they share ids with (the rest appended) and `deleted` ids dropped."""
+    replaced = upserts.index.isin(base.index)
+    out = base
+    if replaced.any():
+        out, changed = _widen(base, upserts[replaced])
+        out = out.copy()
+        for col in REQ_COLS:
+            out.loc[changed.index, col] = changed[col]
+    if len(deleted):
+        out = out.drop(deleted, errors="ignore")
+    if not replaced.all():
+        out = concat_rows(out, upserts[~replaced])
+        if not out.index.is_monotonic_increasing:
+            out = out.sort_index()
+    return out
+
+
+def set_value(df, idx, col, value):
+    if isinstance(df[col].dtype, pd.CategoricalDtype) and value not in df[col].cat.categories:
+        df[col] = df[col].cat.add_categories([value])
+    df.at[idx, col] = value
+
+
+def validate(df):
+    """One row per problem found: record id, column and what is wrong with it."""
+    checks = [
+        ("Time", df["Time"].isna(), "missing or unreadable date"),
+        ("Task / File", df["Task / File"].isna() | (df["Task / File"].str.strip() == ""), "no file name"),
+        ("Amount", df["Amount"] < 0, "negative amount"),
+    ]
+    for col, known in ENUMS.items():
+        checks.append((col, df[col].notna() & ~df[col].isin(known), f"unknown {col.lower()}"))
+    return pd.concat([pd.DataFrame({"Column": col, "Problem": problem}, index=df.index[mask])
+                      for col, mask, problem in checks], sort=False).sort_index()
+
+
+def as_text(value):
+    """How a value is written to (and compared against) storage."""
+    if isinstance(value, pd.Timestamp):
+        return value.strftime(TIME_FORMAT)
+    if value is None or value is pd.NaT or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    return value.item() if hasattr(value, "item") else value
+
+
+def to_storage(df, time_format=TIME_FORMAT):
+    """Plain-text copy of the table in the column layout storage expects."""
+    out = df[REQ_COLS].astype({col: object for col in CATEGORICAL + ["Task / File"]})
+    # Arrow's formatter is ~4x faster than .dt.strftime and always uses English month names
+    out["Time"] = pc.strftime(pa.array(df["Time"]), format=time_format, locale="C").to_numpy(zero_copy_only=False)
+    return out.fillna({col: "" for col in REQ_COLS if col != "Amount"})
@@ -0,0 +1,205 @@
+"""State that every server replica has to agree on.
+
+Each replica keeps its own data snapshot (data.py); what they share through
+here is small:
+
+* ``counter(queue)`` / ``init_counter(queue, seed)`` / ``claim_counter(queue, n=1)``
+  assignment positions, with the same contract as the storage backends'
+* ``version(name)`` / ``bump(name)``  a number every replica moves when it
+  writes, so the others re-check the backend now instead of after cache_ttl
+* ``lock(name)``  a mutex across replicas, for writes the backend can't make
+  atomic itself (Google Sheets' check-then-write)
+
+``shared_state = "local"`` (the default) keeps all of it in the process, which
+is all a single server needs. For several replicas use "sqlite" with a file
+they can all reach (``shared_state_path``), or "redis" (``redis_url``; needs
+the ``redis`` package).
+"""
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+from config import setting
+
+LOCK_TTL = 30     # seconds a lock is held at most, should its holder die
+LOCK_WAIT = 10    # seconds to wait for a lock before giving up
+
+
+class LockTimeout(TimeoutError):
+    """Another replica held the lock for longer than LOCK_WAIT."""
+
+
+# ==========================================
+# ONE PROCESS
+# ==========================================
+class LocalState:
+    shared = False
+
+    def __init__(self):
+        self._values = {}
+        self._guard = threading.Lock()
+        self._locks = {}
+
+    def counter(self, queue):
+        return self._values.get(("counter", queue))
+
+    def init_counter(self, queue, seed):
+        with self._guard:
+            return self._values.setdefault(("counter", queue), seed)
+
+    def claim_counter(self, queue, n=1):
+        with self._guard:
+            value = self._values[("counter", queue)]
+            self._values[("counter", queue)] = value + n
+            return value
+
+    def version(self, name):
+        return self._values.get(("version", name), 0)
+
+    def bump(self, name):
+        with self._guard:
+            self._values[("version", name)] = self.version(name) + 1
+            return self._values[("version", name)]
+
+    @contextlib.contextmanager
+    def lock(self, name):
+        with self._guard:
+            lock = self._locks.setdefault(name, threading.Lock())
+        if not lock.acquire(timeout=LOCK_WAIT):
+            raise LockTimeout(f"Timed out waiting for {name!r}")
+        try:
+            yield
+        finally:
+            lock.release()
+
+
+# ==========================================
+# SQLITE FILE
+# ==========================================
+class SQLiteState:
+    shared = True
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        db = self._db()
+        with db:
+            db.execute("CREATE TABLE IF NOT EXISTS counters (queue TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            db.execute("CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            db.execute("CREATE TABLE IF NOT EXISTS locks (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)")
+
+    def _db(self):
+        # Per-thread connections, as in SQLiteBackend
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def counter(self, queue):
+        row = self._db().execute("SELECT value FROM counters WHERE queue = ?", (queue,)).fetchone()
+        return row[0] if row else None
+
+    def init_counter(self, queue, seed):
+        db = self._db()
+        with db:
+            db.execute("INSERT OR IGNORE INTO counters VALUES (?, ?)", (queue, int(seed)))
+        return self.counter(queue)
+
+    def claim_counter(self, queue, n=1):
+        db = self._db()
+        with db:
+            return db.execute("UPDATE counters SET value = value + ? WHERE queue = ? RETURNING value - ?",
+                              (n, queue, n)).fetchone()[0]
+
+    def version(self, name):
+        row = self._db().execute("SELECT value FROM versions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, name):
+        db = self._db()
+        with db:
+            return db.execute("INSERT INTO versions VALUES (?, 1) ON CONFLICT (name) DO UPDATE SET value = value + 1 "
+                              "RETURNING value", (name,)).fetchone()[0]
+
+    @contextlib.contextmanager
+    def lock(self, name):
+        db = self._db()
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + LOCK_WAIT
+        while True:
+            with db:
+                # Take the lock if it is free or its holder's lease ran out
+                now = time.time()
+                db.execute("DELETE FROM locks WHERE name = ? AND expires < ?", (name, now))
+                if db.execute("INSERT OR IGNORE INTO locks VALUES (?, ?, ?)", (name, owner, now + LOCK_TTL)).rowcount:
+                    break
+            if time.monotonic() > deadline:
+                raise LockTimeout(f"Timed out waiting for {name!r}")
+            time.sleep(0.05)
+        try:
+            yield
+        finally:
+            with db:
+                db.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+
+
+# ==========================================
+# REDIS
+# ==========================================
+class RedisState:
+    shared = True
+    PREFIX = "writewise:"
+
+    def __init__(self, client):
+        self.client = client
+
+    def counter(self, queue):
+        value = self.client.get(f"{self.PREFIX}counter:{queue}")
+        return int(value) if value is not None else None
+
+    def init_counter(self, queue, seed):
+        self.client.set(f"{self.PREFIX}counter:{queue}", int(seed), nx=True)
+        return self.counter(queue)
+
+    def claim_counter(self, queue, n=1):
+        return self.client.incrby(f"{self.PREFIX}counter:{queue}", n) - n
+
+    def version(self, name):
+        return int(self.client.get(f"{self.PREFIX}version:{name}") or 0)
+
+    def bump(self, name):
+        return self.client.incr(f"{self.PREFIX}version:{name}")
+
+    @contextlib.contextmanager
+    def lock(self, name):
+        lock = self.client.lock(f"{self.PREFIX}lock:{name}", timeout=LOCK_TTL)
+        if not lock.acquire(blocking_timeout=LOCK_WAIT):
+            raise LockTimeout(f"Timed out waiting for {name!r}")
+        try:
+            yield
+        finally:
+            lock.release()
+
+
+def make_state():
+    kind = setting("shared_state", "local")
+    if kind == "local":
+        return LocalState()
+    if kind == "sqlite":
+        return SQLiteState(setting("shared_state_path", os.path.join(os.path.dirname(os.path.abspath(__file__)), "writewise-shared.db")))
+    if kind == "redis":
+        import redis  # only needed for this option
+        return RedisState(redis.Redis.from_url(setting("redis_url", "redis://localhost:6379/0")))
+    raise ValueError(f"Unknown shared state: {kind!r}")
+
+
+@st.cache_resource
+def get_state():
+    return make_state()
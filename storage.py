@@ -0,0 +1,405 @@
+"""Storage backends for the task table.
+
+Every backend speaks the same small protocol so the data layer doesn't care
+where rows live:
+
+* ``revision()``  cheap marker that changes whenever the table does (or None)
+* ``read()``      the whole table as a DataFrame indexed by record id
+* ``append(df)``  add records, returns their ids (None = ids unknown, reload)
+* ``update(idx, changes, expected)`` / ``delete(idx, expected)`` touch one
+  record, raising WriteConflict if it no longer matches ``expected``
+* ``changes(since)``  ``(revision, changed_rows, deleted_ids)`` for everything
+  after revision ``since``, or None when the backend can't tell (full read)
+
+``stable_ids`` says whether ids survive a delete (SQLite) or shift like sheet
+rows do (Google Sheets).
+
+``expected`` maps columns to the values the caller saw: KEY_COLS to find the
+record, plus the old values of any columns an update changes, so an edit made
+meanwhile by another operator is a conflict rather than silently overwritten.
+
+Backends also keep the round-robin assignment counters: ``counter(queue)``
+peeks (None if never set), ``init_counter(queue, seed)`` sets it only if
+missing, and ``claim_counter(queue, n=1)`` atomically returns the current value
+and moves it on by ``n``.
+"""
+import contextlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import streamlit as st
+from gspread.utils import rowcol_to_a1
+from streamlit_gsheets import GSheetsConnection
+
+from config import setting
+from perf import backend_call
+from schema import REQ_COLS, TIME_FORMAT, as_text, concat_rows, normalize, set_value, to_storage
+from shared import LockTimeout, get_state
+
+# Columns that identify a record when checking we are about to touch the right row
+KEY_COLS = ["Task / File", "Time"]
+CONFLICT_MSG = "This record was changed by someone else. The table has been reloaded, please try again."
+
+
+class WriteConflict(Exception):
+    """The stored record no longer matches our snapshot; reload and retry."""
+
+
+class StorageUnavailable(Exception):
+    """The last read from storage failed, so writing now could clobber data we haven't seen."""
+
+
+def get_conn():
+    return st.connection("gsheets", type=GSheetsConnection)
+
+
+def expected_values(record, changes=()):
+    """What a write to `record` relies on: its KEY_COLS, plus the current values of the columns it changes."""
+    return {c: as_text(record[c]) for c in dict.fromkeys(KEY_COLS + list(changes))}
+
+
+def _same_record(found, expected):
+    return all(str(as_text(found[c])).strip() == str(as_text(v)).strip() for c, v in expected.items())
+
+
+# ==========================================
+# GOOGLE SHEETS
+# ==========================================
+class GSheetsBackend:
+    stable_ids = False
+    # Sheet row 1 is the header, so record id i lives on sheet row i + 2
+    HEADER_ROWS = 1
+
+    def __init__(self, conn=None):
+        self._conn = conn
+
+    @property
+    def conn(self):
+        return self._conn or get_conn()
+
+    def _worksheet(self):
+        # Only the service-account client exposes the underlying gspread worksheet
+        client = self.conn.client
+        if not hasattr(client, "_select_worksheet"):
+            return None
+        return client._select_worksheet()
+
+    def _sheet_row(self, idx):
+        return int(idx) + 1 + self.HEADER_ROWS
+
+    @backend_call
+    def revision(self):
+        # Drive's modifiedTime is one tiny metadata call; public-URL sheets have no equivalent
+        client = self.conn.client
+        if not hasattr(client, "_open_spreadsheet"):
+            return None
+        try:
+            return client._open_spreadsheet().get_lastUpdateTime()
+        except Exception:
+            return None
+
+    @backend_call
+    def read(self):
+        return self.conn.read(ttl=0)
+
+    def changes(self, since):
+        # Rows carry no stamps in the sheet; the data layer diffs a full read instead
+        return None
+
+    @contextlib.contextmanager
+    def _exclusive(self):
+        # The sheet can't check a row and write it in one call, so writers take
+        # turns, across server replicas when shared state is configured
+        try:
+            with get_state().lock("sheet"):
+                yield
+        except LockTimeout:
+            raise StorageUnavailable("Another server is still writing to the sheet. Please try again.")
+
+    @backend_call
+    def replace(self, df):
+        with self._exclusive():
+            self._rewrite(df, self._worksheet())
+
+    def _rewrite(self, df, ws):
+        """Write the whole table, RAW like appends and cell edits."""
+        # conn.update() writes USER_ENTERED, and Sheets would turn Times into dates
+        # there while the row-level writes leave them text: one column, two types
+        if ws is None:
+            # Only the public-URL connection lacks a worksheet, and it can't write at all
+            self.conn.update(data=to_storage(df))
+            return
+        rows = [list(REQ_COLS)] + [[as_text(v) for v in r] for r in to_storage(df).itertuples(index=False)]
+        if ws.row_count < len(rows) or ws.col_count < len(REQ_COLS):
+            # A values update doesn't grow the grid by itself
+            ws.resize(rows=max(ws.row_count, len(rows)), cols=max(ws.col_count, len(REQ_COLS)))
+        ws.clear()
+        ws.update(range_name="A1", values=rows, value_input_option="RAW")
+
+    def _verify(self, ws, idx, expected):
+        """Check sheet row `idx` is still `expected`; without a worksheet, returns a fresh full read."""
+        if ws is None:
+            fresh = normalize(self.read())
+            ok = idx in fresh.index and _same_record(fresh.loc[idx], expected)
+        else:
+            fresh = None
+            values = ws.row_values(self._sheet_row(idx))
+            # Read the row the way the data layer does, so "1,000" still matches 1000
+            found = normalize(pd.DataFrame([values[:len(REQ_COLS)] + [""] * (len(REQ_COLS) - len(values))], columns=REQ_COLS))
+            ok = not found.empty and _same_record(found.iloc[0], expected)
+        if not ok:
+            raise WriteConflict(CONFLICT_MSG)
+        return fresh
+
+    @backend_call
+    def append(self, new):
+        ws = self._worksheet()
+        if ws is None:
+            # No row-level API: merge into a fresh read, never a stale snapshot
+            with self._exclusive():
+                self._rewrite(concat_rows(normalize(self.read()), new), ws)
+            return None
+        res = ws.append_rows([[as_text(v) for v in r] for r in to_storage(new).itertuples(index=False)],
+                             value_input_option="RAW", insert_data_option="INSERT_ROWS")
+        first = int(re.search(r"![A-Z]+(\d+)", res["updates"]["updatedRange"]).group(1)) - 1 - self.HEADER_ROWS
+        return list(range(first, first + len(new)))
+
+    @backend_call
+    def update(self, idx, changes, expected):
+        ws = self._worksheet()
+        with self._exclusive():
+            fresh = self._verify(ws, idx, expected)
+            if ws is None:
+                for col, val in changes.items():
+                    set_value(fresh, idx, col, val)
+                self._rewrite(fresh, ws)
+                return
+            ws.batch_update([{"range": rowcol_to_a1(self._sheet_row(idx), REQ_COLS.index(col) + 1), "values": [[as_text(val)]]}
+                             for col, val in changes.items()], value_input_option="RAW")
+
+    @backend_call
+    def delete(self, idx, expected):
+        ws = self._worksheet()
+        with self._exclusive():
+            fresh = self._verify(ws, idx, expected)
+            if ws is None:
+                self._rewrite(fresh.drop(idx), ws)
+            else:
+                ws.delete_rows(self._sheet_row(idx))
+
+
+    # The sheet has no atomic increment, so counters live in the shared state:
+    # this process by default (re-seeded from the data after a restart), or
+    # the store every replica uses.
+
+    def counter(self, queue):
+        return get_state().counter(queue)
+
+    def init_counter(self, queue, seed):
+        return get_state().init_counter(queue, seed)
+
+    def claim_counter(self, queue, n=1):
+        return get_state().claim_counter(queue, n)
+
+
+# ==========================================
+# SQLITE
+# ==========================================
+# SQLite keeps Time as ISO text, which sorts like the time itself, so its index
+# serves date ranges and ORDER BY; the rest of the app only ever sees TIME_FORMAT
+DB_TIME = "%Y-%m-%d %H:%M"
+
+
+def _db_time(text):
+    # Text that isn't a time (blank, or typed in by hand) is kept as it is
+    try:
+        return datetime.strptime(text, TIME_FORMAT).strftime(DB_TIME)
+    except (TypeError, ValueError):
+        return text
+
+
+def _db_value(col, value):
+    return _db_time(as_text(value)) if col == "Time" else as_text(value)
+
+
+class SQLiteBackend:
+    stable_ids = True
+    INDEXED = ["Time", "Assigned To", "Type", "Payment Status"]
+    _COLS = ", ".join(f'"{c}"' for c in REQ_COLS)
+    _INSERT = f'INSERT INTO tasks ({_COLS}, rev) VALUES ({", ".join("?" * (len(REQ_COLS) + 1))})'
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        cols = ", ".join(f'"{c}" {"INTEGER" if c == "Amount" else "TEXT"}' for c in REQ_COLS)
+        db = self._db()
+        with db:
+            db.execute(f"CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY, {cols}, rev INTEGER NOT NULL DEFAULT 0)")
+            if "rev" not in {row[1] for row in db.execute("PRAGMA table_info(tasks)")}:
+                db.execute("ALTER TABLE tasks ADD COLUMN rev INTEGER NOT NULL DEFAULT 0")
+            for c in self.INDEXED + ["rev"]:
+                db.execute(f'CREATE INDEX IF NOT EXISTS "ix_tasks_{c}" ON tasks("{c}")')
+            # Every row carries the revision that last wrote it and deletes leave a
+            # tombstone, so changes(since) is two indexed range scans
+            db.execute("CREATE TABLE IF NOT EXISTS tombstones (id INTEGER PRIMARY KEY, rev INTEGER NOT NULL)")
+            db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+            db.execute("INSERT OR IGNORE INTO meta VALUES ('revision', 0)")
+            db.execute("INSERT OR IGNORE INTO meta VALUES ('replaced', 0)")
+            db.execute("CREATE TABLE IF NOT EXISTS counters (queue TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            if db.execute("INSERT OR IGNORE INTO meta VALUES ('time_format', ?)", (DB_TIME,)).rowcount:
+                # Files from before kept Time in TIME_FORMAT; move them over once
+                db.executemany('UPDATE tasks SET "Time" = ? WHERE id = ?',
+                               [(_db_time(t), i) for i, t in db.execute('SELECT id, "Time" FROM tasks')])
+
+    def _db(self):
+        # sqlite3 connections are per thread; Streamlit runs each session on its own
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _bump(self, db):
+        return db.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision' RETURNING value").fetchone()[0]
+
+    @backend_call
+    def revision(self):
+        return self._db().execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+
+    @backend_call
+    def read(self):
+        return self._select(self._db(), "")
+
+    def _select(self, db, where, args=()):
+        df = pd.read_sql_query(f"SELECT id, {self._COLS} FROM tasks {where} ORDER BY id", db, params=args, index_col="id")
+        df.index.name = None
+        times = pd.to_datetime(df["Time"], format=DB_TIME, errors="coerce")
+        text = pc.strftime(pa.array(times), format=TIME_FORMAT, locale="C").to_numpy(zero_copy_only=False)
+        df["Time"] = df["Time"].where(times.isna(), text)
+        return df
+
+    @backend_call
+    def changes(self, since):
+        db = self._db()
+        # One read transaction, so the rows and the revision come from the same snapshot
+        db.execute("BEGIN")
+        try:
+            rev = db.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+            replaced = db.execute("SELECT value FROM meta WHERE key = 'replaced'").fetchone()[0]
+            if since is None or since < replaced:
+                return None
+            rows = self._select(db, "WHERE rev > ?", (since,))
+            # A deleted last id can be reused by a later insert; the live row wins
+            deleted = [row[0] for row in db.execute("SELECT id FROM tombstones WHERE rev > ?", (since,))
+                       if row[0] not in rows.index]
+        finally:
+            db.commit()
+        return rev, rows, deleted
+
+    @backend_call
+    def replace(self, df):
+        db = self._db()
+        with db:
+            rev = self._bump(db)
+            db.execute("DELETE FROM tasks")
+            db.execute("DELETE FROM tombstones")
+            db.execute("UPDATE meta SET value = ? WHERE key = 'replaced'", (rev,))
+            self._insert(db, df, rev)
+
+    def _insert(self, db, df, rev):
+        return [db.execute(self._INSERT, [as_text(v) for v in row] + [rev]).lastrowid
+                for row in to_storage(df, DB_TIME).itertuples(index=False)]
+
+    @backend_call
+    def append(self, new):
+        db = self._db()
+        with db:
+            ids = self._insert(db, new, self._bump(db))
+        return ids
+
+    def _where(self, idx, expected):
+        cols, values = zip(*expected.items())
+        clause = " AND ".join(f'"{c}" = ?' for c in cols)
+        return f"id = ? AND {clause}", [int(idx)] + [_db_value(c, v) for c, v in zip(cols, values)]
+
+    @backend_call
+    def update(self, idx, changes, expected):
+        where, args = self._where(idx, expected)
+        sets = ", ".join(f'"{c}" = ?' for c in changes)
+        db = self._db()
+        with db:
+            if db.execute(f"UPDATE tasks SET {sets}, rev = ? WHERE {where}",
+                          [_db_value(c, v) for c, v in changes.items()] + [self._bump(db)] + args).rowcount != 1:
+                raise WriteConflict(CONFLICT_MSG)
+
+    @backend_call
+    def delete(self, idx, expected):
+        where, args = self._where(idx, expected)
+        db = self._db()
+        with db:
+            if db.execute(f"DELETE FROM tasks WHERE {where}", args).rowcount != 1:
+                raise WriteConflict(CONFLICT_MSG)
+            db.execute("INSERT OR REPLACE INTO tombstones VALUES (?, ?)", (int(idx), self._bump(db)))
+
+
+    @backend_call
+    def counter(self, queue):
+        row = self._db().execute("SELECT value FROM counters WHERE queue = ?", (queue,)).fetchone()
+        return row[0] if row else None
+
+    @backend_call
+    def init_counter(self, queue, seed):
+        db = self._db()
+        with db:
+            db.execute("INSERT OR IGNORE INTO counters VALUES (?, ?)", (queue, int(seed)))
+        return self.counter(queue)
+
+    @backend_call
+    def claim_counter(self, queue, n=1):
+        # A single UPDATE is atomic across threads and processes sharing the file
+        db = self._db()
+        with db:
+            return db.execute("UPDATE counters SET value = value + ? WHERE queue = ? RETURNING value - ?", (n, queue, n)).fetchone()[0]
+
+
+# ==========================================
+# BACKGROUND SHEET SYNC
+# ==========================================
+class SheetMirror(threading.Thread):
+    """Periodically pushes the local table to the Google Sheet so it stays a readable copy."""
+
+    def __init__(self, source, interval):
+        super().__init__(daemon=True, name="sheet-mirror")
+        self.source = source
+        self.interval = interval
+        self.sheet = GSheetsBackend()
+        self.pushed = None
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                rev = self.source.revision()
+                if rev != self.pushed:
+                    self.sheet.replace(normalize(self.source.read()))
+                    self.pushed = rev
+            except Exception:
+                pass  # the sheet is only a mirror; try again next round
+
+
+def make_backend():
+    kind = setting("backend", "gsheets")
+    if kind == "gsheets":
+        return GSheetsBackend()
+    if kind == "sqlite":
+        return SQLiteBackend(setting("sqlite_path", os.path.join(os.path.dirname(os.path.abspath(__file__)), "writewise.db")))
+    raise ValueError(f"Unknown storage backend: {kind!r}")
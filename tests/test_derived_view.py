@@ -0,0 +1,47 @@
+"""derived_view must cache each result under the version of the frame it was computed from."""
+import threading
+
+import data
+from bench import synthetic_tasks
+from schema import normalize
+from storage import SQLiteBackend
+
+
+@data.derived_view(merge=lambda old, delta: old + len(delta.added))
+def row_count(df):
+    return len(df)
+
+
+class WriteAfterVersionRead(dict):
+    """The shared store, with another session's write racing in right after the view reads the version."""
+
+    def __init__(self, store, rows):
+        super().__init__(store)
+        self.rows = rows
+        self.writer = None
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if key == "version" and self.rows:
+            rows, self.rows = self.rows, None
+            self.writer = threading.Thread(target=data.append_rows, args=(rows,))
+            self.writer.start()
+            self.writer.join(0.5)  # only times out if the reader holds the lock
+        return value
+
+
+def test_write_between_version_and_frame(monkeypatch, tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "tasks.db"))
+    backend.replace(normalize(synthetic_tasks(20)))
+    data.use_backend(backend)
+    assert row_count() == 20
+    # Leave the cached result behind the data, so the next call has to compute
+    data.append_rows(synthetic_tasks(1, seed=1, start="2100-01-01").to_dict("records"))
+
+    store = WriteAfterVersionRead(data._store(), synthetic_tasks(1, seed=2, start="2100-01-02").to_dict("records"))
+    monkeypatch.setattr(data, "_store", lambda: store)
+    row_count()
+    store.writer.join()
+    # The write is counted once, not merged in again on top of a frame that already had it
+    assert row_count() == 22
+    assert row_count() == len(data.get_data())
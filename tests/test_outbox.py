@@ -0,0 +1,77 @@
+"""Replaying queued edits and deletes against the Google Sheets backend, where record ids are row positions."""
+import threading
+
+import pytest
+
+import data
+import outbox
+from data import InvalidRows
+from bench import LocalSheet, synthetic_tasks
+from storage import GSheetsBackend
+
+
+class _Idle:
+    wake = threading.Event()  # no background flusher: the test flushes by hand
+
+
+@pytest.fixture
+def journal(monkeypatch, tmp_path):
+    journal = outbox.Journal(str(tmp_path / "outbox.db"))
+    monkeypatch.setattr(outbox, "get_journal", lambda: journal)
+    monkeypatch.setattr(outbox, "_flusher", lambda: _Idle())
+    monkeypatch.setattr(outbox, "WRITE_BEHIND", True)
+    return journal
+
+
+@pytest.fixture
+def sheet():
+    raw = synthetic_tasks(50)
+    raw["Task / File"] = [f"task_{i}.docx" for i in range(len(raw))]
+    sheet = LocalSheet(raw)
+    data.use_backend(GSheetsBackend(sheet))
+    return sheet
+
+
+def test_delete_then_edit(journal, sheet):
+    outbox.delete_record(3, "delete-3")
+    outbox.update_record(10, {"Amount": 12345}, "update-10")
+    outbox.delete_record(20, "delete-20")
+    outbox.flush(journal)
+
+    assert journal.pending() == 0 and journal.failures() == []
+    names = list(sheet.raw["Task / File"])
+    assert "task_3.docx" not in names and "task_20.docx" not in names and len(names) == 48
+    assert sheet.raw.loc[sheet.raw["Task / File"] == "task_10.docx", "Amount"].astype(int).tolist() == [12345]
+
+
+def test_edit_of_a_changed_record_still_conflicts(journal, sheet):
+    outbox.delete_record(3, "delete-3")
+    outbox.update_record(10, {"Amount": 12345}, "update-10")
+    sheet.raw.loc[10, "Time"] = "01-Jan-2030 09:00"  # someone else edited the record meanwhile
+    outbox.flush(journal)
+
+    assert [f["key"] for f in journal.failures()] == ["update-10"]
+
+
+def test_invalid_edit_is_refused(journal, sheet):
+    with pytest.raises(InvalidRows):
+        outbox.update_record(10, {"Amount": -500}, "update-10")
+    assert journal.pending() == 0
+
+    # Edits queued before they were checked are refused when written
+    journal.add("update-11", "update", {"idx": 11, "changes": {"Amount": "-500"},
+                                        "expected": data.expected_values(data.get_data().loc[11], ["Amount"])})
+    outbox.flush(journal)
+    assert [f["key"] for f in journal.failures()] == ["update-11"]
+    assert int(sheet.raw.at[11, "Amount"]) >= 0
+
+
+def test_reading_the_queue_starts_no_flusher(monkeypatch, tmp_path):
+    monkeypatch.setenv("CRM_OUTBOX_PATH", str(tmp_path / "outbox.db"))
+    monkeypatch.setattr(outbox, "WRITE_BEHIND", True)
+    outbox.get_journal.clear()
+    try:
+        assert outbox.pending_rows() == [] and outbox.status() == (0, [])
+        assert "outbox-flush" not in [t.name for t in threading.enumerate()]
+    finally:
+        outbox.get_journal.clear()
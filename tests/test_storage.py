@@ -0,0 +1,35 @@
+"""SQLite keeps Time as ISO text so its index orders by time; callers still see TIME_FORMAT."""
+import sqlite3
+
+import pandas as pd
+
+from bench import synthetic_tasks
+from schema import REQ_COLS, TIME_FORMAT, normalize
+from storage import DB_TIME, SQLiteBackend, expected_values
+
+
+def test_time_is_stored_sortable(tmp_path):
+    raw = synthetic_tasks(30)
+    backend = SQLiteBackend(str(tmp_path / "tasks.db"))
+    ids = backend.append(normalize(raw))
+
+    stored = [t for (t,) in sqlite3.connect(tmp_path / "tasks.db").execute('SELECT "Time" FROM tasks ORDER BY id')]
+    assert stored == pd.to_datetime(raw["Time"], format=TIME_FORMAT).dt.strftime(DB_TIME).tolist()
+    assert backend.read()["Time"].tolist() == raw["Time"].tolist()
+
+    record = normalize(backend.read()).loc[ids[5]]
+    backend.update(ids[5], {"Amount": 7}, expected_values(record, {"Amount": 7}))
+    assert backend.read().at[ids[5], "Amount"] == 7
+
+
+def test_older_files_are_moved_to_sortable_time(tmp_path):
+    raw = synthetic_tasks(10)
+    db = sqlite3.connect(tmp_path / "tasks.db")
+    cols = ", ".join(f'"{c}"' for c in REQ_COLS)
+    db.execute(f"CREATE TABLE tasks (id INTEGER PRIMARY KEY, {cols})")
+    db.executemany(f"INSERT INTO tasks ({cols}) VALUES ({', '.join('?' * len(REQ_COLS))})",
+                   raw[REQ_COLS].astype(str).values.tolist())
+    db.commit()
+
+    assert SQLiteBackend(str(tmp_path / "tasks.db")).read()["Time"].tolist() == raw["Time"].tolist()
+    assert db.execute('SELECT "Time" FROM tasks WHERE id = 1').fetchone()[0] == pd.Timestamp(raw["Time"].iloc[0]).strftime(DB_TIME)
@@ -0,0 +1,23 @@
+"""Look and feel shared by every page: the theme, table formats and page headings."""
+from pathlib import Path
+
+import streamlit as st
+
+import perf
+from config import setting
+
+# Served locally with the icon fonts it imports (see .streamlit/config.toml)
+STYLE = Path(__file__).with_name("static") / "style.css"
+ADMIN_PASSWORD = str(setting("admin_password", "1234"))
+# Time is a real datetime; show it the way the sheet always has
+TIME_COLUMN = st.column_config.DatetimeColumn("Time", format="DD-MMM-YYYY HH:mm")
+
+
+def theme():
+    st.html(STYLE)
+
+
+def title(icon, text):
+    """The page heading. It is the first thing a page shows, so it also marks time to first paint."""
+    st.markdown(f"<h1 class='main-title'><i class='fa-solid {icon} pro-icon text-gradient'></i> {text}</h1>", unsafe_allow_html=True)
+    perf.paint()